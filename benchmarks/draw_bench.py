@@ -0,0 +1,257 @@
+"""
+抽奖核心路径基准测试（无需显示器）：
+
+    python -m benchmarks.draw_bench
+    python -m benchmarks.draw_bench --sizes 10,1000,100000,1000000 --output bench.json
+    python -m benchmarks.draw_bench --compare bench.json
+
+对每种奖品数量 / 数量分布 / recent 长度生成临时配置，测量
+PrizeManager.draw_prize、draw_many（每次 BATCH 次）、recalculate_weights、save、load 和
+AnimationManager.get_weighted_animation 的吞吐、p50/p99 延迟和峰值内存
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from core.persistence import writer
+from core.prize_manager import PrizeManager
+from core.animation_manager import AnimationManager
+
+BATCH = 10000  # draw_many 每次抽取的次数
+
+
+# ---------- 合成配置 ----------
+
+def make_counts(n, dist, rng):
+    if dist == "uniform":
+        return [10] * n
+    if dist == "skewed":
+        # 少数奖品数量很多，大部分只有 1~2 个
+        return [max(1, int(1000 / (i + 1))) for i in range(n)]
+    if dist == "sparse":
+        # 大部分已经抽完
+        return [rng.randint(1, 5) if rng.random() < 0.1 else 0 for _ in range(n)]
+    raise ValueError(f"未知分布：{dist}")
+
+
+def write_prizes(path, n, dist, history, persistence, rng):
+    names = [f"SKU{i:07d}" for i in range(n)]
+    counts = make_counts(n, dist, rng)
+    if not any(counts):
+        counts[0] = 1
+    data = {
+        "prizes": {name: {"count": c} for name, c in zip(names, counts)},
+        "recent": [rng.choice(names) for _ in range(history)],
+        "recent_size": history,
+        "persistence": persistence
+    }
+    with open(path, "w", encoding="utf8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+
+
+def write_animations(path, slots):
+    rare, normal, single = {}, {}, {}
+    for i in range(slots):
+        slot = f"slot{i + 1}"
+        if i % 2 == 0:
+            rare[slot] = f"assets/animations/{slot}_rare.mp4"
+            normal[slot] = f"assets/animations/{slot}_normal.mp4"
+        else:
+            single[slot] = f"assets/animations/{slot}.mp4"
+    with open(path, "w", encoding="utf8") as f:
+        json.dump({
+            "rare": rare,
+            "normal": normal,
+            "single": single,
+            "enabled": [f"slot{i + 1}" for i in range(slots)]
+        }, f, indent=4, ensure_ascii=False)
+
+
+# ---------- 测量 ----------
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def measure(fn, budget, min_iter=3, max_iter=100000, setup=None):
+    """在 budget 秒内重复调用 fn，返回吞吐、延迟分位数和峰值内存"""
+    lat = []
+    started = time.perf_counter()
+    while len(lat) < max_iter:
+        if setup is not None:
+            setup()
+        t = time.perf_counter_ns()
+        fn()
+        lat.append(time.perf_counter_ns() - t)
+        if len(lat) >= min_iter and time.perf_counter() - started > budget:
+            break
+
+    # 峰值内存单独测一次，避免 tracemalloc 干扰计时
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    total = sum(lat) / 1e9
+    lat.sort()
+    return {
+        "iterations": len(lat),
+        "ops_per_sec": len(lat) / total if total > 0 else 0.0,
+        "p50_ms": percentile(lat, 0.50) / 1e6,
+        "p99_ms": percentile(lat, 0.99) / 1e6,
+        "peak_kb": peak / 1024
+    }
+
+
+def bench_case(workdir, n, dist, history, persistence, budget, rng):
+    prizes_path = os.path.join(workdir, "prizes.json")
+    write_prizes(prizes_path, n, dist, history, persistence, rng)
+    backup = prizes_path + ".orig"
+    shutil.copyfile(prizes_path, backup)
+
+    def reset():
+        writer.flush()  # 还没写出的快照不能盖掉恢复的文件
+        shutil.copyfile(backup, prizes_path)
+        for name in ("prizes.journal", "prizes.journal.old"):
+            journal = os.path.join(workdir, name)
+            if os.path.exists(journal):
+                os.remove(journal)
+
+    results = {}
+    results["load"] = measure(lambda: PrizeManager(prizes_path), budget)
+
+    pm = PrizeManager(prizes_path)
+    results["recalculate_weights"] = measure(pm.recalculate_weights, budget)
+    # 保存在后台写出，计入等待落盘的时间才是一次完整保存的开销
+    results["save"] = measure(lambda: (pm.save(), writer.flush()), budget)
+    reset()
+
+    pm = PrizeManager(prizes_path)
+
+    def draw():
+        try:
+            pm.draw_prize()
+        except ValueError:
+            # 抽完后重新载入，保持测量的是正常抽奖
+            reset()
+            pm.load()
+
+    results["draw_prize"] = measure(draw, budget)
+    reset()
+
+    # 批量抽奖只测抽样本身：内存中的管理器，库存放大到够抽 BATCH 次
+    with open(backup, "r", encoding="utf8") as f:
+        data = json.load(f)
+    for p in data["prizes"].values():
+        p["count"] = max(0, p["count"]) * BATCH
+    batch = {}
+
+    def fresh():
+        batch["pm"] = PrizeManager(None, data=json.loads(json.dumps(data)))
+
+    # 每次迭代抽 BATCH 次；单次抽取的耗时 = p50 / BATCH
+    results["draw_many"] = measure(lambda: batch["pm"].draw_many(BATCH), budget,
+                                   min_iter=1, setup=fresh)
+    return results
+
+
+def bench_animation(workdir, slots, budget):
+    path = os.path.join(workdir, "animation_slots.json")
+    write_animations(path, slots)
+    am = AnimationManager(path)
+    return measure(am.get_weighted_animation, budget, max_iter=200000)
+
+
+# ---------- 对比 ----------
+
+def compare(results, baseline, threshold):
+    """p50 比基线慢 threshold 倍以上视为回归"""
+    old = {(r["case"], r["component"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        b = old.get((r["case"], r["component"]))
+        if b is None or b["p50_ms"] <= 0:
+            continue
+        ratio = r["p50_ms"] / b["p50_ms"]
+        if ratio > threshold:
+            regressions.append((r["case"], r["component"], b["p50_ms"], r["p50_ms"], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.draw_bench")
+    parser.add_argument("--sizes", default="10,1000,100000", help="奖品数量，逗号分隔")
+    parser.add_argument("--dists", default="uniform,skewed,sparse", help="数量分布：uniform,skewed,sparse")
+    parser.add_argument("--history", default="5,1000", help="recent 记录长度，逗号分隔")
+    parser.add_argument("--persistence", default="json,journal", help="保存方式：json,journal")
+    parser.add_argument("--slots", default="5,200", help="动画槽位数量，逗号分隔")
+    parser.add_argument("--budget", type=float, default=1.0, help="每项测量的时间预算（秒）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="结果写入 JSON 文件")
+    parser.add_argument("--compare", default=None, help="与之前的结果 JSON 对比")
+    parser.add_argument("--threshold", type=float, default=1.5, help="判定回归的 p50 倍数")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    random.seed(args.seed)
+    workdir = tempfile.mkdtemp(prefix="lottery-bench-")
+    rows = []
+
+    def report(case, component, r):
+        row = dict(case=case, component=component, **r)
+        rows.append(row)
+        print(f"{case:<44} {component:<22} {r['ops_per_sec']:>12.1f}/s "
+              f"p50 {r['p50_ms']:>9.3f}ms p99 {r['p99_ms']:>9.3f}ms "
+              f"peak {r['peak_kb']:>10.1f}KB", flush=True)
+
+    try:
+        for n in [int(x) for x in args.sizes.split(",")]:
+            for dist in args.dists.split(","):
+                for history in [int(x) for x in args.history.split(",")]:
+                    for persistence in args.persistence.split(","):
+                        case = f"prizes={n} dist={dist} history={history} {persistence}"
+                        results = bench_case(workdir, n, dist, history, persistence, args.budget, rng)
+                        for component, r in results.items():
+                            report(case, component, r)
+
+        for slots in [int(x) for x in args.slots.split(",")]:
+            report(f"slots={slots}", "get_weighted_animation",
+                   bench_animation(workdir, slots, args.budget))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    output = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": rows
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump(output, f, indent=4, ensure_ascii=False)
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf8") as f:
+            baseline = json.load(f)
+        regressions = compare(rows, baseline, args.threshold)
+        for case, component, old_ms, new_ms, ratio in regressions:
+            print(f"回归：{case} {component} p50 {old_ms:.3f}ms → {new_ms:.3f}ms (x{ratio:.2f})")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
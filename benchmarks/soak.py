@@ -0,0 +1,287 @@
+"""
+整机耐久测试：在 offscreen Qt 平台上运行完整的 MainWindow，
+反复执行 开始 / 跳过 / 再来一次 / 保存设置，检查长时间运行才会暴露的问题：
+
+    python -m benchmarks.soak
+    python -m benchmarks.soak --cycles 20000 --output soak.json
+    python -m benchmarks.soak --video assets/animations/sample_single.mp4
+
+每轮记录从点击到出结果的延迟；每 --sample-every 轮记录一次 RSS、线程数、
+Qt 对象 / 定时器 / 窗口部件数量和 Python 对象数。预热之后这些指标按最小二乘
+拟合的增长量超过容差（内存、线程或 Qt 对象持续上涨）或某一轮卡住时返回 1
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+# 必须在导入 PySide6 之前设置
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from benchmarks.draw_bench import percentile
+
+
+# ---------- 配置 ----------
+
+def write_config(workdir, cycles, prizes, reel_duration, video):
+    config = os.path.join(workdir, "config")
+    os.makedirs(config, exist_ok=True)
+
+    # 库存足够整个测试抽不完
+    count = cycles // prizes + 10
+    with open(os.path.join(config, "prizes.json"), "w", encoding="utf8") as f:
+        json.dump({
+            "prizes": {f"奖品{i:03d}": {"count": count} for i in range(prizes)},
+            "recent": [],
+            "recent_size": 5
+        }, f, indent=4, ensure_ascii=False)
+
+    # 老虎机走逐帧绘制的路径，缺失的文件走立即出结果的路径，给了视频时再加一个视频槽位
+    slots = {"slot1": "reel", "slot2": "single"}
+    single = {"slot2": os.path.join(workdir, "missing.mp4")}
+    if video:
+        slots["slot3"] = "single"
+        single["slot3"] = os.path.abspath(video)
+    with open(os.path.join(config, "animation_slots.json"), "w", encoding="utf8") as f:
+        json.dump({
+            "slots": slots,
+            "rare": {},
+            "normal": {},
+            "single": single,
+            "reel": {"slot1": {"duration": reel_duration}},
+            "enabled": list(slots)
+        }, f, indent=4, ensure_ascii=False)
+
+
+# ---------- 采样 ----------
+
+def rss_kb():
+    """当前常驻内存（KB）；没有 /proc 时退回峰值"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def os_threads():
+    """进程内的全部线程（含 Qt / 多媒体的原生线程）"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("Threads:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return threading.active_count()
+
+
+def sample(cycle, app, window):
+    from PySide6.QtCore import QObject, QTimer
+    gc.collect()
+    return {
+        "cycle": cycle,
+        "rss_kb": rss_kb(),
+        "threads": os_threads(),
+        "py_threads": threading.active_count(),
+        "qobjects": len(window.findChildren(QObject)),
+        "timers": len(window.findChildren(QTimer)),
+        "widgets": len(app.allWidgets()),
+        "gc_objects": len(gc.get_objects()),
+    }
+
+
+def growth(samples, key):
+    """最小二乘拟合的斜率 × 采样跨度：整个测量区间内的趋势增长量"""
+    xs = [s["cycle"] for s in samples]
+    ys = [s[key] for s in samples]
+    n = len(xs)
+    if n < 2:
+        return 0.0
+    mx, my = sum(xs) / n, sum(ys) / n
+    var = sum((x - mx) ** 2 for x in xs)
+    if var == 0:
+        return 0.0
+    slope = sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / var
+    return slope * (xs[-1] - xs[0])
+
+
+# ---------- 驱动 ----------
+
+def wait_until(app, pred, timeout):
+    from PySide6.QtCore import QEventLoop
+    deadline = time.perf_counter() + timeout
+    while not pred():
+        if time.perf_counter() > deadline:
+            return False
+        app.processEvents(QEventLoop.AllEvents, 10)
+        time.sleep(0.001)
+    return True
+
+
+def pump(app, seconds):
+    wait_until(app, lambda: False, seconds)
+
+
+def run(args):
+    from PySide6.QtWidgets import QApplication
+    from ui.main_window import MainWindow
+
+    rng = random.Random(args.seed)
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    window = MainWindow()
+    window.show()
+    draw = window.drawWindow
+    result = window.resultWindow
+
+    results = []
+    draw.finished.connect(results.append)
+
+    latencies = []
+    samples = []
+    stalls = []
+    for cycle in range(1, args.cycles + 1):
+        before = len(results)
+        started = time.perf_counter()
+        if result.isVisible():
+            result.btnRetry.click()
+        else:
+            window._start_draw()
+
+        if rng.random() < args.skip_ratio:
+            # 在动画中途的随机时刻跳过
+            pump(app, rng.uniform(0, args.reel_duration))
+            if draw.skipBtn.isEnabled():
+                draw.skipBtn.click()
+
+        if not wait_until(app, lambda: len(results) > before, args.timeout):
+            stalls.append(cycle)
+            draw.skipBtn.click()
+            wait_until(app, lambda: len(results) > before, args.timeout)
+        latencies.append(time.perf_counter() - started)
+
+        if cycle % args.save_every == 0:
+            # 返回设置 → 保存（写配置、重新预加载播放器）→ 关闭设置窗口
+            result.btnBack.click()
+            window.settingsWindow.save_and_emit()
+            window.settingsWindow.hide()
+            pump(app, 0.05)
+
+        if cycle % args.sample_every == 0:
+            s = sample(cycle, app, window)
+            window_lat = sorted(latencies[-args.sample_every:])
+            s["p50_ms"] = percentile(window_lat, 0.50) * 1000
+            s["p99_ms"] = percentile(window_lat, 0.99) * 1000
+            samples.append(s)
+            print(f"cycle {cycle:>7} p50 {s['p50_ms']:>8.1f}ms p99 {s['p99_ms']:>8.1f}ms "
+                  f"rss {s['rss_kb'] / 1024:>7.1f}MB threads {s['threads']:>3} "
+                  f"qobjects {s['qobjects']:>5} timers {s['timers']:>3} "
+                  f"widgets {s['widgets']:>4} gc {s['gc_objects']:>8}", flush=True)
+
+    window.close()
+    app.processEvents()
+    return latencies, samples, stalls
+
+
+def check(samples, stalls, args):
+    """返回 (失败原因列表, 各指标的趋势增长量)；只看预热之后的采样"""
+    measured = [s for s in samples if s["cycle"] > args.warmup]
+    limits = {
+        "rss_kb": args.max_rss_growth * 1024,
+        "threads": args.max_object_growth,
+        "py_threads": args.max_object_growth,
+        "qobjects": args.max_object_growth,
+        "timers": args.max_object_growth,
+        "widgets": args.max_object_growth,
+    }
+    failures = []
+    trend = {}
+    for key, limit in limits.items():
+        trend[key] = growth(measured, key)
+        if trend[key] > limit:
+            failures.append(f"{key} 持续增长：{trend[key]:.1f}（容差 {limit:g}）")
+    trend["gc_objects"] = growth(measured, "gc_objects")
+    if stalls:
+        failures.append(f"{len(stalls)} 轮在 {args.timeout:g}s 内没有出结果：{stalls[:10]}")
+    return failures, trend
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.soak")
+    parser.add_argument("--cycles", type=int, default=2000, help="抽奖轮数")
+    parser.add_argument("--prizes", type=int, default=20, help="奖品种类数")
+    parser.add_argument("--reel-duration", type=float, default=0.3, help="老虎机动画时长（秒）")
+    parser.add_argument("--video", default=None, help="再加一个播放该视频的槽位")
+    parser.add_argument("--skip-ratio", type=float, default=0.3, help="中途跳过的比例")
+    parser.add_argument("--save-every", type=int, default=50, help="每多少轮保存一次设置")
+    parser.add_argument("--sample-every", type=int, default=50, help="每多少轮采样一次")
+    parser.add_argument("--warmup", type=int, default=None, help="不参与趋势判断的轮数（默认 10%%）")
+    parser.add_argument("--timeout", type=float, default=10.0, help="单轮出结果的超时（秒）")
+    parser.add_argument("--max-rss-growth", type=float, default=16.0, help="允许的内存趋势增长（MB）")
+    parser.add_argument("--max-object-growth", type=float, default=1.0,
+                        help="允许的线程 / Qt 对象 / 定时器数量趋势增长")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="结果写入 JSON 文件")
+    parser.add_argument("--keep", action="store_true", help="保留临时工作目录")
+    args = parser.parse_args(argv)
+    if args.warmup is None:
+        args.warmup = args.cycles // 10
+
+    random.seed(args.seed)
+    workdir = tempfile.mkdtemp(prefix="lottery-soak-")
+    write_config(workdir, args.cycles, args.prizes, args.reel_duration, args.video)
+    # MainWindow 使用相对路径 config/：先导入，再切换到临时目录
+    import ui.main_window
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        latencies, samples, stalls = run(args)
+    finally:
+        os.chdir(cwd)
+        if args.keep:
+            print(f"工作目录：{workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    failures, trend = check(samples, stalls, args)
+    latencies.sort()
+    summary = {
+        "cycles": len(latencies),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+        "trend": trend,
+        "stalls": stalls,
+        "failures": failures,
+    }
+    print(f"{summary['cycles']} 轮 p50 {summary['p50_ms']:.1f}ms p99 {summary['p99_ms']:.1f}ms "
+          f"max {summary['max_ms']:.1f}ms；预热后趋势增长 "
+          + " ".join(f"{k} {v:+.1f}" for k, v in trend.items()))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump({
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "args": vars(args),
+                "summary": summary,
+                "samples": samples
+            }, f, indent=4, ensure_ascii=False)
+
+    for reason in failures:
+        print(f"失败：{reason}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,31 @@
+import hashlib
 import json
+import os
 import random
+from collections import deque
+
+from core.media_index import MediaIndex
+from core.metrics import timed
+from core.persistence import writer
+
+# 配置中没有声明 slots 时的默认槽位
+DEFAULT_SLOTS = {"slot1": "group", "slot2": "group",
+                 "slot3": "single", "slot4": "single", "slot5": "single"}
+
+# 老虎机动画没有视频文件，抽中时 file 为 "reel:槽位名"
+REEL_PREFIX = "reel:"
+REEL_DEFAULTS = {"duration": 3.0, "reels": 3}
+
+def is_reel(file):
+    return bool(file) and file.startswith(REEL_PREFIX)
 
 class AnimationManager:
     """
-    五个槽位：
-    slot1, slot2 → 抽奖动画组 (rare + normal)
-    slot3, slot4, slot5 → 普通 mp4 文件
+    槽位在配置的 "slots" 中按顺序声明，数量不限：
+    "group"  → 抽奖动画组 (rare + normal)
+    "single" → 普通 mp4 文件
+    "reel"   → 老虎机动画（程序绘制，不解码视频），参数在 "reel" 中：{slot: {duration, reels}}
+    未声明时使用 slot1, slot2 两个组和 slot3 ~ slot5 三个单个动画
     """
 
     def __init__(self, config_path="config/animation_slots.json"):
@@ -14,42 +34,156 @@ class AnimationManager:
         self.rare = {}     # 稀有动画组：{slot1: "xx.mp4"}
         self.normal = {}   # 普通动画组：{slot1: "xx.mp4"}
         self.single = {}   # 单个动画：{slot3: "xx.mp4"}
+        self.reel = {}     # 老虎机参数：{slot6: {"duration": 3.0, "reels": 3}}
 
+        self.slots = {}    # 槽位声明（按显示顺序）：{slot1: "group", slot3: "single"}
         self.enabled = []  # 用户勾选使用
+        self._enabled_set = set()
+        self.file_digest = None  # 最近一次读写配置文件的内容摘要，用来识别自己的写入
+        self.written_digests = deque(maxlen=16)  # 最近几次自己写出的摘要（监视线程可能晚读到较早的一次）
+
+        # 文件元数据（存在、时长、分辨率），保存在配置文件旁边
+        self.index = MediaIndex(os.path.join(os.path.dirname(config_path), "animation_index.json"))
 
         self.load()
 
     def load(self):
-        with open(self.config_path, "r", encoding="utf8") as f:
-            cfg = json.load(f)
-
+        writer.flush()  # 本进程还没写出的保存先落盘
+        with open(self.config_path, "rb") as f:
+            raw = f.read()
+        self.file_digest = hashlib.sha1(raw).hexdigest()
+        self.apply_config(json.loads(raw))
+
+    def apply_config(self, cfg):
+        """
+        使用新的槽位配置（外部修改配置文件时也调用）；元数据索引只重新探测变化的文件
+        返回 (槽位配置是否变化, 已启用的动画文件是否变化)：
+        前者变化时设置界面要重新列出槽位，后者变化时才需要重新预加载播放器
+        """
+        before_config = (self._config(), list(self.slots))  # 槽位顺序也影响设置界面
+        before = self.enabled_files()
         self.rare = cfg["rare"]
         self.normal = cfg["normal"]
         self.single = cfg["single"]
+        self.reel = cfg.get("reel", {})
         self.enabled = cfg["enabled"]
+        self._enabled_set = set(self.enabled)
+
+        # 已配置文件但没有声明的槽位补在最后
+        self.slots = dict(cfg.get("slots") or DEFAULT_SLOTS)
+        for slot in [*self.rare, *self.normal]:
+            self.slots.setdefault(slot, "group")
+        for slot in self.single:
+            self.slots.setdefault(slot, "single")
+        for slot in self.reel:
+            self.slots.setdefault(slot, "reel")
+
+        self.index.refresh(self.all_files())
+        return (self._config(), list(self.slots)) != before_config, self.enabled_files() != before
+
+    def _config(self):
+        """此刻配置的副本（animation_slots.json 的格式）"""
+        cfg = {
+            "slots": dict(self.slots),
+            "rare": dict(self.rare),
+            "normal": dict(self.normal),
+            "single": dict(self.single),
+            "enabled": list(self.enabled)
+        }
+        if self.reel:
+            cfg["reel"] = {slot: dict(opts) for slot, opts in self.reel.items()}
+        return cfg
 
     def save(self):
-        with open(self.config_path, "w", encoding="utf8") as f:
-            json.dump({
-                "rare": self.rare,
-                "normal": self.normal,
-                "single": self.single,
-                "enabled": self.enabled
-            }, f, indent=4, ensure_ascii=False)
+        """交给后台写线程保存（core.persistence），写的是此刻配置的副本"""
+        writer.submit(self.config_path, self._config(), before=self._written)
+
+        self.index.refresh(self.all_files())
+
+    def _written(self, raw):
+        # 写线程中、替换文件之前调用
+        self.file_digest = hashlib.sha1(raw).hexdigest()
+        self.written_digests.append(self.file_digest)
+
+    # ---------- 槽位编辑 ----------
+
+    def is_enabled(self, slot):
+        return slot in self._enabled_set
+
+    def set_enabled(self, slot, on):
+        if on and slot not in self._enabled_set:
+            self.enabled.append(slot)
+            self._enabled_set.add(slot)
+        elif not on and slot in self._enabled_set:
+            self.enabled.remove(slot)
+            self._enabled_set.discard(slot)
+
+    def set_group(self, slot, rare_file, normal_file):
+        self.rare[slot] = rare_file
+        self.normal[slot] = normal_file
+
+    def set_single(self, slot, file):
+        self.single[slot] = file
+
+    def add_slot(self, kind):
+        """新增一个空槽位，返回槽位名"""
+        n = len(self.slots) + 1
+        while f"slot{n}" in self.slots:
+            n += 1
+        slot = f"slot{n}"
+        self.slots[slot] = kind
+        return slot
+
+    def reel_options(self, slot):
+        """老虎机槽位的参数（缺省项用默认值）"""
+        return {**REEL_DEFAULTS, **self.reel.get(slot, {})}
+
+    def remove_slot(self, slot):
+        self.slots.pop(slot, None)
+        self.reel.pop(slot, None)
+        self.rare.pop(slot, None)
+        self.normal.pop(slot, None)
+        self.single.pop(slot, None)
+        self.set_enabled(slot, False)
+
+    def duration(self, file):
+        """动画时长（秒）：视频来自元数据索引，老虎机来自槽位参数；未知时为 None"""
+        if is_reel(file):
+            return self.reel_options(file[len(REEL_PREFIX):])["duration"]
+        return self.index.duration(file)
+
+    def all_files(self):
+        """所有槽位配置的动画文件"""
+        return list(dict.fromkeys([*self.rare.values(), *self.normal.values(), *self.single.values()]))
+
+    def enabled_files(self):
+        """已启用槽位用到的全部动画文件（去重，保持槽位顺序）"""
+        files = []
+        for slot in self.enabled:
+            if slot in self.single:
+                files.append(self.single[slot])
+            elif slot in self.rare and slot in self.normal:
+                files.append(self.normal[slot])
+                files.append(self.rare[slot])
+        return list(dict.fromkeys(files))
 
-    def get_weighted_animation(self):
+    def weighted_choices(self):
+        """返回 (choices, weights)：choices 为 (type, file)，每个启用槽位总权重相同"""
         groups = []
         singles = []
+        reels = []
 
         for slot in self.enabled:
-            if slot in self.single:
+            if self.slots.get(slot) == "reel":
+                reels.append(slot)
+            elif slot in self.single:
                 singles.append(slot)
             elif slot in self.rare and slot in self.normal:
                 groups.append(slot)
 
-        total = len(groups) + len(singles)
+        total = len(groups) + len(singles) + len(reels)
         if total == 0:
-            return None
+            return [], []
 
         W = 1 / total
 
@@ -60,6 +194,10 @@ class AnimationManager:
             choices.append(("single", self.single[s]))
             weights.append(W)
 
+        for s in reels:
+            choices.append(("reel", REEL_PREFIX + s))
+            weights.append(W)
+
         for g in groups:
             rare_file = self.rare[g]
             normal_file = self.normal[g]
@@ -70,4 +208,11 @@ class AnimationManager:
             choices.append(("normal", normal_file))
             weights.append(W * 0.9)
 
+        return choices, weights
+
+    @timed("animation.pick")
+    def get_weighted_animation(self):
+        choices, weights = self.weighted_choices()
+        if not choices:
+            return None
         return random.choices(choices, weights=weights, k=1)[0]
@@ -0,0 +1,141 @@
+"""
+无界面抽奖入口（不导入 Qt）：
+
+    python -m core.cli draw --count 100
+    python -m core.cli draw --count 100000 --batch --config config/prizes.json
+    python -m core.cli history stats --by hour --since 2024-01-01T18:00
+    python -m core.cli history export --format csv > draws.csv
+
+每个结果输出一行 JSON 到 stdout
+"""
+import argparse
+import json
+import random
+import sys
+from datetime import datetime
+
+from core.config_manager import ConfigManager
+from core.prize_manager import PrizeManager
+from core.animation_manager import AnimationManager
+from core.draw_engine import DrawEngine
+from core.draw_server import DrawClient
+from core.history_store import HistoryStore
+
+DEFAULT_PRIZES = "config/prizes.json"
+DEFAULT_ANIMATIONS = "config/animation_slots.json"
+DEFAULT_HISTORY = "config/history"
+
+
+def _emit(out, index, anim, prize):
+    anim_type, anim_file = anim if anim is not None else (None, None)
+    out.write(json.dumps({
+        "index": index,
+        "prize": prize,
+        "animation": anim_type,
+        "file": anim_file
+    }, ensure_ascii=False) + "\n")
+
+
+def cmd_draw(args):
+    if args.config == DEFAULT_PRIZES and args.animations == DEFAULT_ANIMATIONS:
+        ConfigManager.ensure_default()
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    pm = DrawClient(args.server) if args.server else PrizeManager(args.config)
+    am = AnimationManager(args.animations)
+    history = HistoryStore(args.history) if args.history else None
+    engine = DrawEngine(pm, am, history=history, kiosk=args.kiosk)
+    out = sys.stdout
+
+    if args.batch:
+        # 一次抽完，只保存一次
+        prizes = engine.draw_many(args.count)
+        for i, prize in enumerate(prizes):
+            _emit(out, i, am.get_weighted_animation(), prize)
+        drawn = len(prizes)
+    else:
+        drawn = 0
+        for i in range(args.count):
+            try:
+                anim_type, anim_file, prize = engine.draw_now()
+            except ValueError:
+                break
+            _emit(out, i, (anim_type, anim_file), prize)
+            out.flush()
+            drawn += 1
+
+    out.flush()
+    if history is not None:
+        history.close()
+    if drawn < args.count:
+        print(f"奖品已全部抽完，仅抽出 {drawn}/{args.count} 个", file=sys.stderr)
+        return 1
+    return 0
+
+
+def _parse_time(text):
+    return datetime.fromisoformat(text).timestamp()
+
+
+def cmd_history_stats(args):
+    store = HistoryStore(args.dir)
+    result = store.counts(by=args.by, start=args.since, end=args.until,
+                          prize=args.prize, kiosk=args.kiosk)
+    print(json.dumps(result, indent=4, ensure_ascii=False))
+    store.close()
+    return 0
+
+
+def cmd_history_export(args):
+    store = HistoryStore(args.dir)
+    n = store.export(sys.stdout, fmt=args.format, start=args.since, end=args.until)
+    sys.stdout.flush()
+    store.close()
+    print(f"已导出 {n} 条记录", file=sys.stderr)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m core.cli", description="无界面抽奖")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    draw = sub.add_parser("draw", help="抽奖并按行输出 JSON 结果")
+    draw.add_argument("--count", type=int, default=1, help="抽奖次数")
+    draw.add_argument("--config", default=DEFAULT_PRIZES, help="奖品配置 prizes.json")
+    draw.add_argument("--animations", default=DEFAULT_ANIMATIONS, help="动画配置 animation_slots.json")
+    draw.add_argument("--batch", action="store_true", help="批量抽取，结束后只保存一次")
+    draw.add_argument("--server", default=None, help="使用共用库存的抽奖服务 host:port 或 unix:/path")
+    draw.add_argument("--seed", type=int, default=None, help="随机种子（便于复现）")
+    draw.add_argument("--history", default=None, help=f"把结果写入抽奖历史目录（界面默认 {DEFAULT_HISTORY}）")
+    draw.add_argument("--kiosk", default=None, help="历史记录中的终端名，默认为主机名")
+    draw.set_defaults(func=cmd_draw)
+
+    history = sub.add_parser("history", help="查询 / 导出抽奖历史")
+    history_sub = history.add_subparsers(dest="history_command", required=True)
+
+    stats = history_sub.add_parser("stats", help="按奖品 / 终端 / 动画 / 得主 / 小时统计次数")
+    stats.add_argument("--by", choices=["prize", "kiosk", "anim", "winner", "hour"], default="prize")
+    stats.add_argument("--prize", default=None, help="只统计这个奖品")
+    stats.add_argument("--kiosk", default=None, help="只统计这个终端")
+    stats.set_defaults(func=cmd_history_stats)
+
+    export = history_sub.add_parser("export", help="流式导出全部记录到 stdout")
+    export.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    export.set_defaults(func=cmd_history_export)
+
+    for p in (stats, export):
+        p.add_argument("--dir", default=DEFAULT_HISTORY, help="抽奖历史目录")
+        p.add_argument("--since", type=_parse_time, default=None, help="起始时刻（ISO 格式，含）")
+        p.add_argument("--until", type=_parse_time, default=None, help="结束时刻（ISO 格式，不含）")
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
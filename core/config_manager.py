@@ -13,7 +13,8 @@ class ConfigManager:
                         "奖品B": {"count": 5},
                         "奖品C": {"count": 5}
                     },
-                    "recent": []
+                    "recent": [],
+                    "recent_size": 5
                 }, f, indent=4, ensure_ascii=False)
 
         # 创建初始 animation 配置
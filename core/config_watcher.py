@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from core.prize_manager import check_config
+
+class ConfigWatcher:
+    """
+    轮询监视若干文件的 (mtime, size)，发生变化后等待 debounce 秒内不再变化，
+    再读取内容回调 callback(path, raw)；连续多次写入只回调一次
+    回调在监视线程中执行
+    """
+
+    def __init__(self, paths, callback, interval=0.5, debounce=0.3):
+        self.paths = list(paths)
+        self.callback = callback
+        self.interval = interval
+        self.debounce = debounce
+        self._known = {path: self._signature(path) for path in self.paths}
+        self._pending = {}  # {path: 最近一次看到变化的时刻}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _signature(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="config-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+
+    def poll(self):
+        """检查一次；返回本次回调过的文件"""
+        now = time.monotonic()
+        fired = []
+        for path in self.paths:
+            sig = self._signature(path)
+            if sig != self._known[path]:
+                self._known[path] = sig
+                self._pending[path] = now
+                continue
+
+            since = self._pending.get(path)
+            if since is None or now - since < self.debounce or sig is None:
+                continue  # 还在写 / 文件暂时不存在（删除后重建）
+            del self._pending[path]
+            try:
+                with open(path, "rb") as f:
+                    raw = f.read()
+            except OSError:
+                continue
+            fired.append(path)
+            self.callback(path, raw)
+        return fired
+
+
+class ConfigReloader:
+    """
+    监视 prizes.json 和 animation_slots.json，把外部修改按差异应用到运行中的管理器
+
+    只解析发生变化的文件；内容与管理器最近读写过的摘要之一相同时视为程序自己的写入，跳过
+    奖品的修改交给 DrawEngine 的计算线程应用（与抽奖串行，抽奖进行中时自动延后）；
+    动画配置通过 dispatch(fn) 在持有 AnimationManager 的线程中应用（UI 传入切回 GUI 线程的函数），
+    槽位配置变化时调用 on_animations(files_changed)，files_changed 表示已启用的动画文件是否变化
+    """
+
+    def __init__(self, engine, dispatch=None, on_animations=None, interval=0.5, debounce=0.3):
+        self.engine = engine
+        self.dispatch = dispatch or (lambda fn: fn())
+        self.on_animations = on_animations
+
+        self._managers = {}   # {path: manager}
+        self._baseline = {}   # {path: 上次应用时的原始内容}，外部修改与它比较得出差异
+        for manager in (engine.pm, engine.am):
+            path = getattr(manager, "config_path", None)
+            if path is None:
+                continue  # 连接抽奖服务时库存不在本机
+            self._managers[path] = manager
+            try:
+                with open(path, "rb") as f:
+                    self._baseline[path] = f.read()
+            except OSError:
+                self._baseline[path] = None
+
+        self.watcher = ConfigWatcher(self._managers, self._on_change, interval, debounce)
+
+    def start(self):
+        self.watcher.start()
+
+    def stop(self):
+        self.watcher.stop()
+
+    def _on_change(self, path, raw):
+        manager = self._managers[path]
+        old_raw, self._baseline[path] = self._baseline[path], raw
+        digest = hashlib.sha1(raw).hexdigest()
+        if digest == manager.file_digest or digest in manager.written_digests:
+            return  # 程序自己保存的（可能已经被更新的保存盖过）
+
+        try:
+            new = json.loads(raw)
+        except ValueError:
+            self._baseline[path] = old_raw  # 写了一半或格式错误，等下一次修改
+            return
+
+        if manager is self.engine.am:
+            self.dispatch(lambda: self._apply_animations(new))
+            return
+
+        try:
+            check_config(new)
+        except ValueError as e:
+            # 不应用（也不会被保存覆盖掉），之后的修改仍与上次应用的内容比较
+            self._baseline[path] = old_raw
+            print(f"忽略 {path} 的修改：{e}", file=sys.stderr)
+            return
+        old = json.loads(old_raw) if old_raw else {}
+        future = self.engine.apply(lambda: manager.apply_changes(old, new))
+        future.add_done_callback(lambda f: self._report(path, f))
+
+    @staticmethod
+    def _report(path, future):
+        # 在计算线程中应用，出错时没有人等这个 Future，只能在这里报告
+        if not future.cancelled() and future.exception() is not None:
+            print(f"应用 {path} 的修改失败：{future.exception()!r}", file=sys.stderr)
+
+    def _apply_animations(self, cfg):
+        changed, files_changed = self.engine.am.apply_config(cfg)
+        if changed and self.on_animations is not None:
+            self.on_animations(files_changed)
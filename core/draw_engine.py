@@ -1,39 +1,196 @@
+import socket
 import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from core.metrics import metrics, timed
+
+# UI 一直没有通知半程时，最多等这么久也会算出结果，避免计算线程永久挂起
+MAX_WAIT = 30.0
 
 class DrawEngine:
     """
     控制抽奖 → 动画半程计算 → 跳过 → 显示结果
+
+    计算在单个常驻线程里进行；start_draw 返回 Future，
+    结果算出后立即回调 finish_callback(prize)，UI 无需轮询
+
+    prefetch > 0 时后台预先抽好最多 prefetch 个结果（按当前权重和库存，
+    但不保存），揭晓时才确认写入；通过 apply() 修改库存时撤销并重新预抽
+
+    history 为 HistoryStore 时，每个确认的结果连同终端名 kiosk 和动画类型写入历史
+
+    PrizeManager 配置了名单（pm.roster）时，每个奖品同时抽出一位得主，
+    结果为 "奖品：姓名（工号）"；名单抽完时与奖品抽完一样抛出 ValueError
+    连接抽奖服务时（DrawClient）名单在服务端，得主由服务端抽出、随结果返回（pm.last_winners）
     """
 
-    def __init__(self, prize_manager, animation_manager):
+    def __init__(self, prize_manager, animation_manager, prefetch=0, history=None, kiosk=None):
         self.pm = prize_manager
         self.am = animation_manager
+        self.prefetch = prefetch
+        self.history = history
+        self.kiosk = kiosk or socket.gethostname()
+
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="draw")
+        self._lock = threading.Lock()  # 保护 PrizeManager
+        self._future = None
+        self._go = threading.Event()
 
-        self.result = None
-        self.calculated = False
+        if self.prefetch > 0:
+            self._executor.submit(self._refill)
 
-    def start_draw(self, animation_callback, finish_callback):
+    @timed("engine.start_draw")
+    def start_draw(self, animation_callback, finish_callback, delay=None):
         """
-        animation_callback → 播放动画
-        finish_callback → 动画结束/跳过后显示结果
+        animation_callback(anim_file) → 播放动画（无动画时 anim_file 为 None）
+        finish_callback(prize) → 结果算出后在计算线程中调用，奖品抽完时 prize 为 None
+        delay → 多少秒后开始计算；None 时取动画时长的一半（时长未知则等 UI 调用 resolve()）
+
+        返回 (anim_type, anim_file, future)
         """
 
         # ① 先随机选择动画
-        anim_type, anim_file = self.am.get_weighted_animation()
-        self.calculated = False
-        self.result = None
+        item = self.am.get_weighted_animation()
+        anim_type, anim_file = item if item is not None else (None, None)
+
+        # 默认在动画半程计算（时长来自元数据索引或老虎机参数），UI 也可以提前 resolve()
+        if delay is None and anim_file is not None:
+            duration = self.am.duration(anim_file)
+            if duration:
+                delay = duration / 2
+
+        # 上一次还没算出的抽奖作废
+        self.cancel()
+
+        future = Future()
+        go = threading.Event()
+        self._future = future
+        self._go = go
+        started = time.perf_counter()
+
+        def done(f):
+            if f.cancelled():
+                metrics.count("engine.cancelled")
+                return
+            # 从开始抽奖到结果算出（包含等待动画半程）
+            metrics.observe("engine.time_to_result", time.perf_counter() - started)
+            finish_callback(f.result() if f.exception() is None else None)
+
+        future.add_done_callback(done)
 
         # 开始播放动画
         animation_callback(anim_file)
 
-        # ② 新线程用于计算抽奖结果
-        def compute():
-            time.sleep(2.5)  # 动画3秒，半程计算
-            self.result = self.pm.draw_prize()
-            self.calculated = True
+        # ② 计算线程等到半程再抽
+        self._executor.submit(self._compute, future, go, delay, anim_type)
+        return anim_type, anim_file, future
+
+    def resolve(self):
+        """动画到达半程 / 用户跳过：立即计算结果，可重复调用"""
+        self._go.set()
 
-        threading.Thread(target=compute).start()
+    def cancel(self):
+        """作废尚未开始计算的抽奖"""
+        if self._future is not None and self._future.cancel():
+            self._go.set()
 
-        # ③ 结束动画的回调由 UI 调用 finish_callback()
-        return anim_type, anim_file
+    def apply(self, fn):
+        """
+        在计算线程中执行 fn()：与抽奖串行，正在进行的抽奖结束后才执行，不阻塞调用方
+        执行前撤销预抽结果，执行后按新状态重新预抽；返回 Future
+        """
+        def run():
+            with self._lock:
+                self.pm.release_reserved()
+                fn()
+            self.prefetch = getattr(self.pm, "prefetch", self.prefetch)
+            if self.prefetch > 0:
+                self._refill()
+        return self._executor.submit(run)
+
+    def close(self):
+        self.cancel()
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            self.pm.release_reserved()
+
+    def _take(self, anim_type=None):
+        """取一个结果并确认：优先用预抽好的，没有就现抽"""
+        metrics.count("engine.draws")
+        winner = None
+        with self._lock:
+            roster = getattr(self.pm, "roster", None)
+            if roster is not None and roster.remaining() == 0:
+                raise ValueError("名单中的人已全部抽完")
+            if self.pm.reserved_count() > 0:
+                metrics.count("engine.prefetch_hits")
+                result = self.pm.commit_reserved()
+            else:
+                result = self.pm.draw_prize()
+            if roster is not None:
+                winner = roster.label(roster.draw())
+            elif getattr(self.pm, "last_winners", None):
+                winner = self.pm.last_winners[0]  # 服务端按名单抽出的得主
+        if self.history is not None:
+            self.history.append(result, self.kiosk, anim_type, winner=winner)
+        return result if winner is None else f"{result}：{winner}"
+
+    def _refill(self):
+        with self._lock:
+            while self.pm.reserved_count() < self.prefetch:
+                try:
+                    self.pm.reserve()
+                except ValueError:
+                    break  # 剩余奖品不够预抽
+
+    def _compute(self, future, go, delay, anim_type=None):
+        go.wait(MAX_WAIT if delay is None else delay)
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            with metrics.span("engine.take"):
+                result = self._take(anim_type)
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+        # 揭晓后马上补齐队列，下一次抽奖无需等待
+        if self.prefetch > 0:
+            self._refill()
+
+    def draw_now(self):
+        """
+        同步抽奖：不播放动画、不等待半程，直接返回
+        (anim_type, anim_file, prize)，没有可用动画时前两项为 None
+        """
+        item = self.am.get_weighted_animation()
+        anim_type, anim_file = item if item is not None else (None, None)
+        prize = self._take(anim_type)
+        if self.prefetch > 0:
+            self._executor.submit(self._refill)
+        return anim_type, anim_file, prize
+
+    def draw_many(self, k):
+        """
+        批量抽奖：不播放动画，直接连续抽取 k 次
+        返回按顺序的奖品列表（奖品抽完时可能少于 k 个）
+        """
+        winners = None
+        with self._lock:
+            roster = getattr(self.pm, "roster", None)
+            if roster is not None:
+                k = min(k, roster.remaining())
+            results = self.pm.draw_many(k)
+            if roster is not None:
+                winners = [roster.label(i) for i in roster.draw_many(len(results))]
+            else:
+                winners = getattr(self.pm, "last_winners", None)
+        if self.history is not None:
+            self.history.append_many(results, self.kiosk, winners=winners)
+        if winners is not None:
+            results = [f"{prize}：{winner}" for prize, winner in zip(results, winners)]
+        if self.prefetch > 0:
+            self._executor.submit(self._refill)
+        return results
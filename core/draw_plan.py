@@ -0,0 +1,74 @@
+import heapq
+import json
+import random
+from array import array
+
+from core.weight_tree import WeightTree
+
+def generate(counts, max_run=2, last=None, run=0, rand=random.random):
+    """
+    生成恰好把 counts（按下标的剩余数量）全部抽完的顺序，返回 array("I") 下标序列
+
+    同一奖品最多连续 max_run 次（默认 2，即不会连续三次）；last / run 为此前已抽出
+    结果末尾的奖品下标和它连续出现的次数，新序列与之衔接
+
+    每一步在允许的奖品中按剩余数量加权随机选择；剩余最多的奖品 d 若不马上抽
+    就再也排不开（m > max_run × 其余总数）时强制抽 d。只剩一种奖品时无法满足，
+    才允许超过 max_run。每一步 O(log n)
+    """
+    left = [max(0, int(c)) for c in counts]
+    remaining = sum(left)
+    tree = WeightTree(left)
+    heap = [(-c, i) for i, c in enumerate(left) if c > 0]
+    heapq.heapify(heap)
+
+    plan = array("I")
+    for _ in range(remaining):
+        # 剩余最多的奖品（跳过数量已变化的旧条目）
+        while -heap[0][0] != left[heap[0][1]]:
+            heapq.heappop(heap)
+        m, d = -heap[0][0], heap[0][1]
+        blocked = last if run >= max_run else None
+
+        if m > max_run * (remaining - m) and d != blocked:
+            i = d
+        else:
+            if blocked is not None:
+                tree.update(blocked, 0)
+            total = tree.total()
+            i = tree.find(rand() * total) if total > 0 else blocked
+            if blocked is not None:
+                tree.update(blocked, left[blocked])
+
+        left[i] -= 1
+        tree.update(i, left[i])
+        if left[i] > 0:
+            heapq.heappush(heap, (-left[i], i))
+        run = run + 1 if i == last else 1
+        last = i
+        remaining -= 1
+        plan.append(i)
+    return plan
+
+
+def dumps(names, max_run, plan):
+    """计划文件内容：第一行 JSON 头（奖品名表、max_run），之后是 uint32 下标序列"""
+    header = json.dumps({"names": names, "max_run": max_run}, ensure_ascii=False)
+    return header.encode("utf8") + b"\n" + plan.tobytes()
+
+
+def load(path):
+    """读取计划文件，返回 (names, max_run, plan)；文件不存在或损坏时返回 None"""
+    try:
+        with open(path, "rb") as f:
+            raw = f.read()
+        head, _, body = raw.partition(b"\n")
+        header = json.loads(head)
+        plan = array("I")
+        plan.frombytes(body[:len(body) // plan.itemsize * plan.itemsize])
+        names = header["names"]
+        if plan and max(plan) >= len(names):
+            return None
+        return names, header["max_run"], plan
+    except (OSError, ValueError, KeyError):
+        return None
@@ -0,0 +1,325 @@
+"""
+多终端共用一份库存的抽奖服务：
+
+    python -m core.draw_server --port 8765
+    python -m core.draw_server --unix /tmp/lottery.sock --config config/prizes.json
+
+服务独占一个 PrizeManager；各终端的 DrawEngine 用 DrawClient 代替本地 PrizeManager
+prizes.json 配置了名单（roster）时由服务端为每个奖品抽出得主，各终端共用一份名单，
+同一个人不会在两个终端都中奖
+
+协议：每行一个 JSON
+    {"id": 1, "op": "draw", "count": 1}   →  {"id": 1, "ok": true, "results": ["奖品A"]}
+                                             配置了名单时还有 "winners": ["张三（1001）"]
+    {"id": 2, "op": "stock"}              →  {"id": 2, "ok": true, "stock": {"奖品A": 4}}
+    {"id": 3, "op": "names", "limit": 40} →  {"id": 3, "ok": true, "names": ["奖品A"]}
+"""
+import argparse
+import asyncio
+import json
+import signal
+import socket
+import sys
+import threading
+
+from core.persistence import writer, SHUTDOWN_TIMEOUT
+from core.prize_manager import PrizeManager
+
+MAX_COUNT = 100000  # 单个请求最多抽取的次数
+
+
+class DrawServer:
+    """
+    所有连接的抽奖请求进入同一个队列，由唯一的抽奖协程按批处理：
+    一批请求合并成一次 draw_many（只保存一次），结果按到达顺序分配
+    抽奖和保存放在线程里执行，不阻塞网络收发；读库存等其他操作与抽奖互斥，
+    同样在线程里执行，不会读到抽到一半的状态
+    """
+
+    def __init__(self, prize_manager, max_batch=4096):
+        self.pm = prize_manager
+        self.max_batch = max_batch
+        self._queue = None
+        self._worker = None
+        self._servers = []
+        self._lock = None
+
+    async def start(self, host=None, port=None, path=None):
+        self._queue = asyncio.Queue()
+        self._lock = asyncio.Lock()
+        self._worker = asyncio.ensure_future(self._draw_loop())
+        if path is not None:
+            self._servers.append(await asyncio.start_unix_server(self._handle, path=path))
+        if port is not None:
+            self._servers.append(await asyncio.start_server(self._handle, host, port))
+
+    async def serve_forever(self):
+        await asyncio.gather(*(s.serve_forever() for s in self._servers))
+
+    async def close(self):
+        for s in self._servers:
+            s.close()
+            await s.wait_closed()
+        if self._worker is not None:
+            self._worker.cancel()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    req = json.loads(line)
+                except ValueError:
+                    req = None
+                if not isinstance(req, dict):
+                    self._reply(writer, {"ok": False, "error": "bad request"})
+                    continue
+
+                try:
+                    await self._dispatch(req, writer)
+                except (ValueError, TypeError) as e:
+                    self._reply(writer, {"id": req.get("id"), "ok": False, "error": f"bad request: {e}"})
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # 服务关闭时取消仍在等待请求的连接
+        finally:
+            writer.close()
+
+    async def _dispatch(self, req, writer):
+        loop = asyncio.get_running_loop()
+        rid = req.get("id")
+        op = req.get("op")
+        if op == "draw":
+            count = _positive_int(req.get("count", 1), "count", MAX_COUNT)
+            # 不等结果就继续读下一行，同一连接可以流水线发送
+            fut = loop.create_future()
+            fut.add_done_callback(lambda f: self._reply_draw(writer, rid, f))
+            self._queue.put_nowait((count, fut))
+        elif op == "stock":
+            stock = await self._run(lambda: {name: p["count"] for name, p in self.pm.prizes.items()})
+            self._reply(writer, {"id": rid, "ok": True, "stock": stock})
+        elif op == "names":
+            limit = _positive_int(req.get("limit", 40), "limit", MAX_COUNT)
+            names = await self._run(self.pm.sample_names, limit)
+            self._reply(writer, {"id": rid, "ok": True, "names": names})
+        else:
+            self._reply(writer, {"id": rid, "ok": False, "error": f"unknown op {op}"})
+
+    async def _run(self, func, *args):
+        """在线程中执行，与抽奖互斥"""
+        async with self._lock:
+            return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _reply(self, writer, msg):
+        if not writer.is_closing():
+            writer.write(json.dumps(msg, ensure_ascii=False).encode("utf8") + b"\n")
+
+    def _reply_draw(self, writer, rid, fut):
+        if fut.cancelled():
+            return
+        if fut.exception() is not None:
+            self._reply(writer, {"id": rid, "ok": False, "error": f"抽奖失败：{fut.exception()}"})
+            return
+        results, winners = fut.result()
+        msg = {"id": rid, "ok": True, "results": results}
+        if winners is not None:
+            msg["winners"] = winners
+        self._reply(writer, msg)
+
+    def _draw_batch(self, total):
+        """
+        抽 total 次，返回 (奖品列表, 得主列表)；没有名单时得主列表为 None
+        名单的规则与 DrawEngine 相同：每个奖品抽出一位得主，名单抽完就停
+        """
+        roster = self.pm.roster
+        if roster is None:
+            return self.pm.draw_many(total), None
+        results = self.pm.draw_many(min(total, roster.remaining()))
+        return results, [roster.label(i) for i in roster.draw_many(len(results))]
+
+    async def _draw_loop(self):
+        while True:
+            batch = [await self._queue.get()]
+            total = batch[0][0]
+            while not self._queue.empty() and total < self.max_batch:
+                item = self._queue.get_nowait()
+                batch.append(item)
+                total += item[0]
+
+            try:
+                results, winners = await self._run(self._draw_batch, total)
+            except Exception as e:
+                # 这一批都回复失败，服务继续处理之后的请求
+                print(f"抽奖失败：{e!r}", file=sys.stderr)
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            pos = 0
+            for count, fut in batch:
+                if not fut.done():
+                    fut.set_result((results[pos:pos + count],
+                                    winners[pos:pos + count] if winners is not None else None))
+                pos += count
+
+
+def _positive_int(value, name, limit):
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 < value <= limit:
+        raise ValueError(f"{name} 必须是 1 到 {limit} 之间的整数")
+    return value
+
+
+class DrawClient:
+    """
+    DrawServer 的同步客户端，提供 DrawEngine 用到的 PrizeManager 接口
+    address："host:port" 或 "unix:/path/to.sock"
+    """
+
+    prefetch = 0  # 预抽只在持有库存的一方进行
+    roster = None  # 名单在服务端，得主随结果返回
+
+    def __init__(self, address, timeout=10.0):
+        self.address = address
+        self.timeout = timeout
+        self.last_winners = None  # 最近一次抽奖服务端抽出的得主，没有名单时为 None
+        self._lock = threading.Lock()
+        self._sock = None
+        self._file = None
+        self._next_id = 0
+
+    def _connect(self):
+        if self.address.startswith("unix:"):
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.address[len("unix:"):])
+        else:
+            host, port = self.address.rsplit(":", 1)
+            sock = socket.create_connection((host, int(port)), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        self._file = sock.makefile("rb")
+
+    def close(self):
+        with self._lock:
+            if self._sock is not None:
+                self._file.close()
+                self._sock.close()
+                self._sock = self._file = None
+
+    def _call(self, req):
+        """
+        发送请求并等待回复；连接断开时重连一次
+        抽奖不是幂等的：请求发出之后才失败（读回复超时、连接被重置）时服务端可能已经抽过，
+        不再重发，直接抛给调用方，避免一次抽奖用掉两份库存
+        """
+        retry_after_send = req.get("op") != "draw"
+        with self._lock:
+            for attempt in (0, 1):
+                sent = False
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._next_id += 1
+                    req["id"] = self._next_id
+                    self._sock.sendall(json.dumps(req, ensure_ascii=False).encode("utf8") + b"\n")
+                    sent = True
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionError("服务端关闭了连接")
+                    break
+                except OSError:
+                    if self._sock is not None:
+                        self._sock.close()
+                    self._sock = self._file = None
+                    if attempt or (sent and not retry_after_send):
+                        raise
+        resp = json.loads(line)
+        if not resp.get("ok"):
+            raise RuntimeError(resp.get("error", "抽奖服务出错"))
+        return resp
+
+    @property
+    def prizes(self):
+        return {name: {"count": c} for name, c in self._call({"op": "stock"})["stock"].items()}
+
+    def sample_names(self, limit):
+        return self._call({"op": "names", "limit": limit})["names"]
+
+    def draw_prize(self):
+        results = self.draw_many(1)
+        if not results:
+            raise ValueError("奖品或名单已全部抽完" if self.last_winners is not None else "奖品已全部抽完")
+        return results[0]
+
+    def draw_many(self, k):
+        if k <= 0:
+            self.last_winners = None
+            return []
+        resp = self._call({"op": "draw", "count": k})
+        self.last_winners = resp.get("winners")
+        return resp["results"]
+
+    # 客户端不持有库存，没有预抽结果
+    def reserve(self):
+        raise ValueError("客户端模式不支持预抽")
+
+    def reserved_count(self):
+        return 0
+
+    def commit_reserved(self):
+        raise ValueError("客户端模式不支持预抽")
+
+    def release_reserved(self):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.draw_server", description="多终端抽奖服务")
+    parser.add_argument("--config", default="config/prizes.json", help="奖品配置 prizes.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="TCP 端口")
+    parser.add_argument("--unix", default=None, help="Unix socket 路径")
+    args = parser.parse_args(argv)
+    if args.port is None and args.unix is None:
+        args.port = 8765
+
+    server = DrawServer(PrizeManager(args.config))
+
+    async def run():
+        await server.start(host=args.host, port=args.port, path=args.unix)
+        where = [f"{args.host}:{args.port}"] if args.port is not None else []
+        if args.unix:
+            where.append(f"unix:{args.unix}")
+        print(f"抽奖服务已启动：{', '.join(where)}", file=sys.stderr)
+
+        # systemd / docker stop 发送 SIGTERM：关闭服务后照常退出，最后的保存才能写完
+        serving = asyncio.ensure_future(server.serve_forever())
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, serving.cancel)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows 的事件循环不支持，Ctrl+C 仍按 KeyboardInterrupt 处理
+        try:
+            await serving
+        except asyncio.CancelledError:
+            pass
+        await server.close()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # 抽奖结果由后台写线程保存，退出前必须落盘，否则重启后会再次发出同一份库存
+        writer.flush(SHUTDOWN_TIMEOUT)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
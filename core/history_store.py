@@ -0,0 +1,282 @@
+import csv
+import json
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from datetime import datetime
+
+# 列文件：名称 → array 类型码
+COLUMNS = {"times": "d", "prizes": "I", "kiosks": "I", "anims": "I", "winners": "I"}
+# 后来增加的列：旧目录中没有时按空字符串补齐
+ADDED_COLUMNS = ("winners",)
+
+EXPORT_CHUNK = 65536
+
+
+class HistoryStore:
+    """
+    只追加的抽奖历史，按列存放在 path 目录中：
+
+    times.d / prizes.I / kiosks.I / anims.I / winners.I
+                                              每条记录在每列占一个定长值（时间戳、字符串编号）
+    strings.jsonl                             字符串表，第 n 行是编号 n 的字符串
+    hours.q                                   小时索引：(小时, 该小时第一条记录的序号) 成对追加
+
+    追加一条记录只在每个文件末尾写几个字节；时间戳保证不减，
+    按时间范围查询先用小时索引定位，再在时间列上二分
+    """
+
+    def __init__(self, path="config/history"):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self._strings = []
+        self._ids = {}
+        self._hours = array("q")   # 小时
+        self._starts = array("q")  # 该小时第一条记录的序号
+        self._last_time = 0.0
+        self.count = 0
+        self._files = {}
+
+        self._open()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _open(self):
+        # 字符串表（崩溃时可能写了半行）
+        strings_path = self._file("strings.jsonl")
+        good = 0
+        if os.path.exists(strings_path):
+            with open(strings_path, "rb") as f:
+                for line in f:
+                    try:
+                        s = json.loads(line)
+                    except ValueError:
+                        break
+                    good += len(line)
+                    self._ids[s] = len(self._strings)
+                    self._strings.append(s)
+            _truncate(strings_path, good)
+        self._files["strings"] = open(strings_path, "a", encoding="utf8")
+
+        # 各列长度可能因崩溃不一致，取最短的
+        sizes = {}
+        for name, code in COLUMNS.items():
+            p = self._file(f"{name}.{code}")
+            if os.path.exists(p):
+                sizes[name] = os.path.getsize(p) // array(code).itemsize
+            elif name not in ADDED_COLUMNS:
+                sizes[name] = 0
+        self.count = min(sizes.values())
+        for name, code in COLUMNS.items():
+            p = self._file(f"{name}.{code}")
+            if name in sizes:
+                _truncate(p, self.count * array(code).itemsize)
+            else:
+                with open(p, "wb") as f:
+                    (array(code, [self._intern("")]) * self.count).tofile(f)
+
+        index = array("q")
+        hours_path = self._file("hours.q")
+        if os.path.exists(hours_path):
+            with open(hours_path, "rb") as f:
+                raw = f.read()
+            index.frombytes(raw[:len(raw) // 16 * 16])
+        self._hours = index[0::2]
+        self._starts = index[1::2]
+        while self._starts and self._starts[-1] >= self.count:
+            self._hours.pop()
+            self._starts.pop()
+        _truncate(hours_path, len(self._hours) * 16)
+
+        if self.count:
+            self._last_time = self._column("times", self.count - 1, self.count)[0]
+
+        for name, code in COLUMNS.items():
+            self._files[name] = open(self._file(f"{name}.{code}"), "ab")
+        self._files["hours"] = open(hours_path, "ab")
+
+    def close(self):
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+
+    # ---------- 写入 ----------
+
+    def _intern(self, s):
+        s = "" if s is None else str(s)
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self._strings)
+            self._strings.append(s)
+            f = self._files["strings"]
+            f.write(json.dumps(s, ensure_ascii=False) + "\n")
+            f.flush()
+        return i
+
+    def append(self, prize, kiosk="", anim=None, t=None, winner=None):
+        self.append_many([prize], kiosk, anim, t, None if winner is None else [winner])
+
+    def append_many(self, prizes, kiosk="", anim=None, t=None, winners=None):
+        """追加一批同一时刻、同一终端的记录；winners 为对应的得主（没有名单时为 None）"""
+        if not prizes:
+            return
+        with self._lock:
+            t = max(time.time() if t is None else t, self._last_time)
+            self._last_time = t
+            n = len(prizes)
+
+            hour = int(t // 3600)
+            if not self._hours or self._hours[-1] != hour:
+                self._hours.append(hour)
+                self._starts.append(self.count)
+                self._files["hours"].write(array("q", (hour, self.count)).tobytes())
+                self._files["hours"].flush()
+
+            kiosk_id = self._intern(kiosk)
+            anim_id = self._intern(anim)
+            columns = {
+                "times": array("d", [t]) * n,
+                "prizes": array("I", [self._intern(p) for p in prizes]),
+                "kiosks": array("I", [kiosk_id]) * n,
+                "anims": array("I", [anim_id]) * n,
+                "winners": (array("I", [self._intern(w) for w in winners]) if winners
+                            else array("I", [self._intern("")]) * n),
+            }
+            # 字符串表和小时索引先于各列写出，列中出现的编号一定已经存在
+            for name, values in columns.items():
+                f = self._files[name]
+                f.write(values.tobytes())
+                f.flush()
+            self.count += n
+
+    # ---------- 查询 ----------
+
+    def _column(self, name, lo, hi):
+        code = COLUMNS[name]
+        values = array(code)
+        if hi <= lo:
+            return values
+        size = values.itemsize
+        with open(self._file(f"{name}.{code}"), "rb") as f:
+            f.seek(lo * size)
+            values.frombytes(f.read((hi - lo) * size))
+        return values
+
+    def _range(self, start=None, end=None):
+        """时间在 [start, end) 内的记录序号范围 (lo, hi)"""
+        n = self.count
+        lo, hi = 0, n
+        if start is not None:
+            lo = self._locate(start)
+        if end is not None:
+            hi = self._locate(end)
+        return lo, max(lo, hi)
+
+    def _locate(self, t):
+        """第一条时间 >= t 的记录序号"""
+        hour = int(t // 3600)
+        k = bisect_left(self._hours, hour)
+        if k >= len(self._hours):
+            return self.count
+        lo = self._starts[k]
+        hi = self._starts[k + 1] if k + 1 < len(self._starts) else self.count
+        if self._hours[k] != hour:
+            return lo  # 该小时没有记录，下一个有记录的小时从 lo 开始
+        times = self._column("times", lo, hi)
+        return lo + bisect_left(times, t)
+
+    def counts(self, by="prize", start=None, end=None, prize=None, kiosk=None):
+        """
+        按 by（"prize" / "kiosk" / "anim" / "winner" / "hour"）统计时间范围 [start, end) 内的次数
+        prize / kiosk 给出时只统计对应的记录；返回 {键: 次数}，"hour" 的键为 ISO 格式的整点时刻
+        """
+        lo, hi = self._range(start, end)
+        if lo >= hi:
+            return {}
+
+        mask = None
+        for name, value in (("prizes", prize), ("kiosks", kiosk)):
+            if value is None:
+                continue
+            sid = self._ids.get(value)
+            if sid is None:
+                return {}
+            col = self._column(name, lo, hi)
+            keep = [v == sid for v in col]
+            mask = keep if mask is None else [a and b for a, b in zip(mask, keep)]
+
+        if by == "hour":
+            if mask is None:
+                # 不需要逐条扫描：小时索引给出每小时的记录数
+                result = {}
+                k = bisect_right(self._starts, lo) - 1
+                while k < len(self._starts) and self._starts[k] < hi:
+                    a = max(lo, self._starts[k])
+                    b = min(hi, self._starts[k + 1] if k + 1 < len(self._starts) else self.count)
+                    if b > a:
+                        result[_hour_iso(self._hours[k])] = b - a
+                    k += 1
+                return result
+            times = self._column("times", lo, hi)
+            counter = Counter(int(t // 3600) for t, m in zip(times, mask) if m)
+            return {_hour_iso(h): c for h, c in sorted(counter.items())}
+
+        name = {"prize": "prizes", "kiosk": "kiosks", "anim": "anims", "winner": "winners"}[by]
+        col = self._column(name, lo, hi)
+        if mask is None:
+            counter = Counter(col)
+        else:
+            counter = Counter(v for v, m in zip(col, mask) if m)
+        strings = self._strings
+        return {strings[i]: c for i, c in counter.most_common()}
+
+    def iter_records(self, start=None, end=None):
+        """按顺序逐条产生 (序号, 时间戳, 奖品, 终端, 动画, 得主)，分块读取，内存占用固定"""
+        lo, hi = self._range(start, end)
+        strings = self._strings
+        for a in range(lo, hi, EXPORT_CHUNK):
+            b = min(hi, a + EXPORT_CHUNK)
+            cols = [self._column(name, a, b) for name in COLUMNS]
+            for i, (t, p, k, an, w) in enumerate(zip(*cols)):
+                yield a + i, t, strings[p], strings[k], strings[an], strings[w]
+
+    def export(self, out, fmt="csv", start=None, end=None):
+        """流式导出到文本文件对象 out，fmt 为 "csv" 或 "jsonl"；返回导出的记录数"""
+        n = 0
+        if fmt == "csv":
+            writer = csv.writer(out)
+            writer.writerow(["index", "time", "prize", "kiosk", "animation", "winner"])
+            for i, t, prize, kiosk, anim, winner in self.iter_records(start, end):
+                writer.writerow([i, _iso(t), prize, kiosk, anim, winner])
+                n += 1
+        elif fmt == "jsonl":
+            for i, t, prize, kiosk, anim, winner in self.iter_records(start, end):
+                out.write(json.dumps({"index": i, "time": _iso(t), "prize": prize,
+                                      "kiosk": kiosk, "animation": anim or None,
+                                      "winner": winner or None},
+                                     ensure_ascii=False) + "\n")
+                n += 1
+        else:
+            raise ValueError(f"不支持的导出格式：{fmt}")
+        return n
+
+
+def _truncate(path, size):
+    if os.path.exists(path) and os.path.getsize(path) != size:
+        with open(path, "r+b") as f:
+            f.truncate(size)
+
+
+def _iso(t):
+    return datetime.fromtimestamp(t).isoformat(timespec="milliseconds")
+
+
+def _hour_iso(hour):
+    return datetime.fromtimestamp(hour * 3600).isoformat(timespec="minutes")
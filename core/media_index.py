@@ -0,0 +1,178 @@
+import json
+import os
+import shutil
+import struct
+import subprocess
+import threading
+
+class MediaIndex:
+    """
+    动画文件元数据索引：{path: {exists, size, mtime, duration, width, height}}
+    在后台线程中探测，保存在 animation_slots.json 旁边，按 size/mtime 失效
+    抽奖时只查内存，不访问文件系统
+    """
+
+    def __init__(self, index_path="config/animation_index.json"):
+        self.index_path = index_path
+        self.entries = {}
+        self._thread = None
+        self._pending = None   # 探测中又有新的刷新请求
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, "r", encoding="utf8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf8") as f:
+            json.dump(self.entries, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    # ---------- 查询（只读内存） ----------
+
+    def get(self, path):
+        return self.entries.get(path)
+
+    def exists(self, path):
+        entry = self.entries.get(path)
+        if entry is None:
+            # 尚未探测过，只能现查一次
+            return os.path.exists(path)
+        return entry["exists"]
+
+    def duration(self, path):
+        """秒；未知时为 None"""
+        entry = self.entries.get(path)
+        return entry.get("duration") if entry else None
+
+    # ---------- 刷新 ----------
+
+    def refresh(self, files, wait=False):
+        """后台重新检查 files：未变化的沿用旧结果，变化的重新探测"""
+        files = list(dict.fromkeys(files))
+        with self._lock:
+            if self._thread is not None:
+                self._pending = files
+                thread = self._thread
+            else:
+                thread = threading.Thread(target=self._run, args=(files,),
+                                          name="media-index", daemon=True)
+                self._thread = thread
+                thread.start()
+        if wait:
+            thread.join()
+
+    def _run(self, files):
+        while files is not None:
+            old = self.entries
+            entries = {path: self._check(path, old.get(path)) for path in files}
+            # 整体替换，读取方不需要加锁
+            self.entries = entries
+            try:
+                self.save()
+            except OSError:
+                pass
+            with self._lock:
+                files, self._pending = self._pending, None
+                if files is None:
+                    self._thread = None
+
+    def _check(self, path, entry):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return {"exists": False, "size": 0, "mtime": 0,
+                    "duration": None, "width": None, "height": None}
+
+        if entry and entry.get("exists") and entry["size"] == st.st_size and entry["mtime"] == st.st_mtime:
+            return entry
+
+        duration, width, height = probe(path)
+        return {"exists": True, "size": st.st_size, "mtime": st.st_mtime,
+                "duration": duration, "width": width, "height": height}
+
+
+def probe(path):
+    """返回 (duration 秒, width, height)，无法识别的项为 None"""
+    try:
+        info = _probe_mp4(path)
+    except (OSError, IndexError, struct.error):
+        info = None
+    if info is None:
+        info = _probe_ffprobe(path)
+    return info or (None, None, None)
+
+
+def _iter_boxes(f, start, end):
+    """遍历 ISO BMFF (mp4/mov) box：yield (type, 内容起点, 内容终点)"""
+    pos = start
+    while pos + 8 <= end:
+        f.seek(pos)
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header:
+            return
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def _probe_mp4(path):
+    """直接读 moov/mvhd/tkhd，免去外部工具"""
+    with open(path, "rb") as f:
+        end = os.fstat(f.fileno()).st_size
+        moov = next(((s, e) for kind, s, e in _iter_boxes(f, 0, end) if kind == b"moov"), None)
+        if moov is None:
+            return None
+
+        duration = width = height = None
+        for kind, s, e in _iter_boxes(f, *moov):
+            if kind == b"mvhd":
+                f.seek(s)
+                version = f.read(1)[0]
+                if version == 1:
+                    f.seek(s + 20)
+                    timescale, length = struct.unpack(">IQ", f.read(12))
+                else:
+                    f.seek(s + 12)
+                    timescale, length = struct.unpack(">II", f.read(8))
+                if timescale:
+                    duration = length / timescale
+            elif kind == b"trak" and width is None:
+                for sub, ss, se in _iter_boxes(f, s, e):
+                    if sub == b"tkhd":
+                        # 宽高是 16.16 定点数，位于 tkhd 末尾
+                        f.seek(se - 8)
+                        w, h = struct.unpack(">II", f.read(8))
+                        if w and h:
+                            width, height = w >> 16, h >> 16
+        return duration, width, height
+
+
+def _probe_ffprobe(path):
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe is None:
+        return None
+    try:
+        out = subprocess.run(
+            [ffprobe, "-v", "error", "-select_streams", "v:0",
+             "-show_entries", "stream=width,height:format=duration",
+             "-of", "json", path],
+            capture_output=True, timeout=10, check=True).stdout
+        info = json.loads(out)
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+    stream = (info.get("streams") or [{}])[0]
+    duration = info.get("format", {}).get("duration")
+    return (float(duration) if duration else None,
+            stream.get("width"), stream.get("height"))
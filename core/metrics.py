@@ -0,0 +1,231 @@
+"""
+运行时埋点：span 耗时直方图和计数器，定期导出为 JSON 或 Prometheus 文本
+
+    LOTTERY_METRICS=metrics.json python main.py    # 或 --metrics metrics.prom
+    LOTTERY_METRICS_INTERVAL=5                      # 导出间隔（秒），默认 10
+
+文件名以 .prom 结尾时导出 Prometheus 文本格式，否则导出 JSON
+未启用时 span() 返回共用的空上下文，@timed 只多一次属性判断
+"""
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+# 直方图分桶上界（秒）：0.1ms … 10s，超出的计入 +Inf
+BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+          0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NULL = nullcontext()
+
+
+class Histogram:
+    """
+    counts 为启动以来的累计分桶（Prometheus 用）；
+    另外保留最近 window 个导出周期的分桶，用来算滚动分位数
+    """
+
+    def __init__(self, window=6):
+        self.counts = [0] * (len(BOUNDS) + 1)
+        self.sum = 0.0
+        self.total = 0
+        self._slots = deque([[0] * (len(BOUNDS) + 1)], maxlen=window)
+        self._maxes = deque([0.0], maxlen=window)
+
+    def observe(self, seconds):
+        b = bisect.bisect_left(BOUNDS, seconds)
+        self.counts[b] += 1
+        self._slots[-1][b] += 1
+        if seconds > self._maxes[-1]:
+            self._maxes[-1] = seconds
+        self.sum += seconds
+        self.total += 1
+
+    def rotate(self):
+        """进入下一个周期，最旧的周期滚出窗口"""
+        self._slots.append([0] * (len(BOUNDS) + 1))
+        self._maxes.append(0.0)
+
+    def recent(self):
+        """滚动窗口内的 {count, p50, p95, p99, max}，分位数取所在分桶的上界"""
+        counts = [sum(c) for c in zip(*self._slots)]
+        n = sum(counts)
+        peak = max(self._maxes)
+        result = {"count": n, "max": peak}
+        for q in (0.5, 0.95, 0.99):
+            value = None
+            if n:
+                acc = 0
+                for b, c in enumerate(counts):
+                    acc += c
+                    if acc >= q * n:
+                        value = min(BOUNDS[b], peak) if b < len(BOUNDS) else peak
+                        break
+            result[f"p{round(q * 100)}"] = value
+        return result
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Metrics:
+    """
+    with metrics.span("prize.save"): ...
+    metrics.count("ui.skips")
+    metrics.observe("ui.first_frame", seconds)
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.interval = 10.0
+        self.histograms = {}  # {name: Histogram}
+        self.counters = {}    # {name: int}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+        path = os.environ.get("LOTTERY_METRICS")
+        if path:
+            self.enable(path, float(os.environ.get("LOTTERY_METRICS_INTERVAL", 10)))
+
+    def enable(self, path=None, interval=None):
+        """开始记录；给出 path 时每 interval 秒导出一次"""
+        self.enabled = True
+        if interval is not None:
+            self.interval = interval
+        if path:
+            self.path = path
+        if self.path and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """停止导出线程，并写出最后一次结果"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        if self.enabled and self.path:
+            self.export()
+
+    # ---------- 记录 ----------
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL
+        return _Span(self, name)
+
+    def observe(self, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            h = self.histograms.get(name)
+            if h is None:
+                h = self.histograms[name] = Histogram()
+            h.observe(seconds)
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    # ---------- 导出 ----------
+
+    def snapshot(self):
+        """{"time", "counters", "spans": {name: {count, sum, p50, p95, p99, max, recent_count}}}"""
+        with self._lock:
+            spans = {}
+            for name, h in sorted(self.histograms.items()):
+                recent = h.recent()
+                spans[name] = {
+                    "count": h.total,
+                    "sum": h.sum,
+                    "recent_count": recent["count"],
+                    "p50": recent["p50"],
+                    "p95": recent["p95"],
+                    "p99": recent["p99"],
+                    "max": recent["max"],
+                }
+            return {"time": time.time(), "counters": dict(sorted(self.counters.items())), "spans": spans}
+
+    def to_prometheus(self):
+        lines = [
+            "# HELP lottery_span_seconds Latency of instrumented operations",
+            "# TYPE lottery_span_seconds histogram",
+        ]
+        with self._lock:
+            for name, h in sorted(self.histograms.items()):
+                acc = 0
+                for bound, c in zip(BOUNDS + ("+Inf",), h.counts):
+                    acc += c
+                    lines.append(f'lottery_span_seconds_bucket{{span="{name}",le="{bound}"}} {acc}')
+                lines.append(f'lottery_span_seconds_sum{{span="{name}"}} {h.sum}')
+                lines.append(f'lottery_span_seconds_count{{span="{name}"}} {h.total}')
+
+            lines.append("# HELP lottery_events_total Instrumented event counters")
+            lines.append("# TYPE lottery_events_total counter")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f'lottery_events_total{{name="{name}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, path=None):
+        path = path or self.path
+        if path.endswith(".prom"):
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.snapshot(), indent=4, ensure_ascii=False)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.export()
+            except OSError:
+                pass
+            with self._lock:
+                for h in self.histograms.values():
+                    h.rotate()
+
+
+# 进程内共用一个
+metrics = Metrics()
+
+
+def timed(name):
+    """装饰器：把函数耗时记为 span name；未启用时直接调用原函数"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,90 @@
+import atexit
+import json
+import os
+import sys
+import threading
+
+from core.metrics import metrics
+
+class WriteBehind:
+    """
+    后台写配置文件：调用方只交出数据快照，序列化和写盘都在写线程中完成
+
+    同一路径在写出前多次提交时只保留最新的一份，连续的保存合并成一次写
+    每次写先写临时文件并 fsync，再原子替换，写到一半崩溃也不会损坏原文件
+    flush() 等待已提交的内容全部落盘，退出前调用（进程退出时也会自动调用）
+    """
+
+    def __init__(self):
+        self._pending = {}   # path → (data, before, after)，同一路径只留最新的
+        self._busy = False   # 写线程正在写
+        self._cond = threading.Condition()
+        self._thread = None
+        self.last_error = None
+
+    def submit(self, path, data, before=None, after=None):
+        """
+        排队把 data 写到 path：bytes 原样写出，可调用对象在写线程中调用、写出它返回的 bytes，
+        其他按 JSON 写出（提交后调用方不能再修改 data）
+        before(raw) 在替换文件前、after() 在替换之后调用，都在写线程中执行；
+        被更新的提交合并掉时，它的 before / after 不再调用
+        """
+        with self._cond:
+            if path in self._pending:
+                metrics.count("persist.coalesced")
+            self._pending[path] = (data, before, after)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self, timeout=None):
+        """等待已提交的内容全部写完；超时返回 False"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                path = next(iter(self._pending))
+                data, before, after = self._pending.pop(path)
+                self._busy = True
+            try:
+                with metrics.span("persist.write"):
+                    _write(path, data, before)
+                if after is not None:
+                    after()
+            except Exception as e:
+                # 序列化或回调出错也不能让写线程退出，否则 flush() 永远等不到；
+                # 下一次保存会带着更新的数据重试
+                self.last_error = e
+                metrics.count("persist.errors")
+                print(f"保存失败：{path}：{e!r}", file=sys.stderr)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+
+def _write(path, data, before=None):
+    if isinstance(data, bytes):
+        raw = data
+    elif callable(data):
+        raw = data()
+    else:
+        raw = json.dumps(data, indent=4, ensure_ascii=False).encode("utf8")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(raw)
+        f.flush()
+        os.fsync(f.fileno())
+    if before is not None:
+        before(raw)
+    os.replace(tmp_path, path)
+
+
+SHUTDOWN_TIMEOUT = 10.0  # 退出时最多等待写完的秒数，写盘卡住也能退出
+
+writer = WriteBehind()
+atexit.register(writer.flush, SHUTDOWN_TIMEOUT)
@@ -0,0 +1,402 @@
+"""
+prizes.json 的二进制快照（prizes.<代号>.snap），给奖品种类很多（MIN_PRIZES 以上）的活动用：
+
+    python -m core.prize_snapshot config/prizes.json
+
+载入时映射到内存，不解析 JSON、不为每个奖品建 dict：奖品名首尾相接存成一个字符串表，
+数量、名字的偏移和按名字查找的哈希表都是定长数组，每个奖品十几个字节；
+还可以带上与这些数量对应的权重树（权重和树状数组），载入时不用重新计算权重
+快照记下 prizes.json 的大小和修改时间，对不上（外部改过）时 PrizeManager 重新解析并重建
+
+每次生成快照都写到代号加一的新文件，不替换正在映射的旧文件（Windows 上替换或删除
+映射中的文件会失败）；载入最新的一份，更旧的在删得掉时删除
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import sys
+import zlib
+from array import array
+
+MAGIC = b"LOTSNAP1"
+MIN_PRIZES = 10000  # 奖品种类达到这个数量才生成快照
+
+
+class PrizeTable:
+    """
+    按下标存放的奖品表，用法与 {name: {"count": n}} 相同（取出的是按需生成的 _Entry）
+    只能修改已有奖品的数量等字段，不能增删奖品（需要时用 to_dict() 换回 dict）
+
+    blob / offsets / counts / slots 可以是 bytes、array 或映射文件上的 memoryview
+    """
+
+    def __init__(self, blob, offsets, counts, slots, extras=None):
+        self._blob = blob
+        self._offsets = offsets    # 第 i 个名字在 blob 中的 [offsets[i], offsets[i + 1])
+        self.counts = counts
+        self._slots = slots        # 开放寻址哈希表：下标 + 1，0 为空
+        self._mask = len(slots) - 1
+        self._extras = extras or {}  # 下标 → count 以外的字段，只有少数奖品有
+        self.names = _Names(self)
+        self.index = _Index(self)
+
+    @classmethod
+    def build(cls, prizes):
+        """从 {name: {"count": n, ...}} 生成"""
+        parts = []
+        offsets = array("Q", [0])
+        counts = array("q")
+        extras = {}
+        pos = 0
+        for i, (name, p) in enumerate(prizes.items()):
+            data = name.encode("utf8")
+            parts.append(data)
+            pos += len(data)
+            offsets.append(pos)
+            counts.append(int(p.get("count", 0)))
+            if len(p) > 1 or "count" not in p:
+                extras[i] = {k: v for k, v in p.items() if k != "count"}
+
+        size = 8
+        while size < 2 * len(counts):
+            size *= 2
+        slots = array("I", [0]) * size
+        mask = size - 1
+        for i, data in enumerate(parts):
+            h = zlib.crc32(data) & mask
+            while slots[h]:
+                h = (h + 1) & mask
+            slots[h] = i + 1
+        return cls(b"".join(parts), offsets, counts, slots, extras)
+
+    def _name(self, i):
+        return str(self._blob[self._offsets[i]:self._offsets[i + 1]], "utf8")
+
+    def _find(self, name):
+        """名字 → 下标，没有时为 -1"""
+        data = name.encode("utf8")
+        slots, offsets, blob = self._slots, self._offsets, self._blob
+        h = zlib.crc32(data) & self._mask
+        while True:
+            i = slots[h] - 1
+            if i < 0:
+                return -1
+            if blob[offsets[i]:offsets[i + 1]] == data:
+                return i
+            h = (h + 1) & self._mask
+
+    # ---------- dict 接口 ----------
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __contains__(self, name):
+        return isinstance(name, str) and self._find(name) >= 0
+
+    def __getitem__(self, name):
+        i = self._find(name)
+        if i < 0:
+            raise KeyError(name)
+        return _Entry(self, i)
+
+    def get(self, name, default=None):
+        i = self._find(name)
+        return _Entry(self, i) if i >= 0 else default
+
+    def keys(self):
+        return iter(self.names)
+
+    def values(self):
+        return (_Entry(self, i) for i in range(len(self)))
+
+    def items(self):
+        return ((name, _Entry(self, i)) for i, name in enumerate(self.names))
+
+    def copy(self):
+        """数量和额外字段单独复制，名字部分共用"""
+        return PrizeTable(self._blob, self._offsets, _array("q", self.counts), self._slots,
+                          {i: dict(e) for i, e in self._extras.items()})
+
+    def to_dict(self):
+        return {name: dict(entry) for name, entry in self.items()}
+
+    def __reduce__(self):
+        # 映射文件上的 memoryview 不能 pickle（如传给模拟的子进程），换成 bytes / array
+        return (PrizeTable, (bytes(self._blob), _array("Q", self._offsets), _array("q", self.counts),
+                             _array("I", self._slots), self._extras))
+
+
+class _Names:
+    """下标 → 奖品名（按需解码）"""
+
+    def __init__(self, table):
+        self._table = table
+
+    def __len__(self):
+        return len(self._table.counts)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._table._name(i)
+
+    def __iter__(self):
+        blob, offsets = self._table._blob, self._table._offsets
+        for i in range(len(self)):
+            yield str(blob[offsets[i]:offsets[i + 1]], "utf8")
+
+
+class _Index:
+    """奖品名 → 下标，用法与 dict 相同"""
+
+    def __init__(self, table):
+        self._table = table
+
+    def get(self, name, default=None):
+        if name is None:
+            return default
+        i = self._table._find(name)
+        return i if i >= 0 else default
+
+    def __getitem__(self, name):
+        i = self._table._find(name)
+        if i < 0:
+            raise KeyError(name)
+        return i
+
+    def __contains__(self, name):
+        return name in self._table
+
+
+class _Entry:
+    """表中一个奖品，用法与 {"count": n, ...} 相同，修改直接写回表"""
+
+    __slots__ = ("_table", "_i")
+
+    def __init__(self, table, i):
+        self._table = table
+        self._i = i
+
+    def __getitem__(self, key):
+        if key == "count":
+            return self._table.counts[self._i]
+        extras = self._table._extras.get(self._i)
+        if extras is None:
+            raise KeyError(key)
+        return extras[key]
+
+    def __setitem__(self, key, value):
+        if key == "count":
+            self._table.counts[self._i] = int(value)
+        else:
+            self._table._extras.setdefault(self._i, {})[key] = value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        return ["count", *self._table._extras.get(self._i, ())]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def update(self, other):
+        for k, v in other.items():
+            self[k] = v
+
+
+def _array(code, values):
+    a = array(code)
+    a.frombytes(memoryview(values).cast("B"))
+    return a
+
+
+# ---------- 文件 ----------
+
+def snapshot_path(config_path, generation):
+    return f"{os.path.splitext(config_path)[0]}.{generation}.snap"
+
+
+def generations(config_path):
+    """已有快照的代号，从新到旧"""
+    prefix = os.path.basename(os.path.splitext(config_path)[0]) + "."
+    try:
+        files = os.listdir(os.path.dirname(config_path) or ".")
+    except OSError:
+        return []
+    gens = []
+    for name in files:
+        middle = name[len(prefix):-len(".snap")]
+        if name.startswith(prefix) and name.endswith(".snap") and middle.isdigit():
+            gens.append(int(middle))
+    return sorted(gens, reverse=True)
+
+
+def remove_older(config_path, generation):
+    """删除比 generation 旧的快照；还被映射着删不掉的留到下次"""
+    for gen in generations(config_path):
+        if gen < generation:
+            try:
+                os.remove(snapshot_path(config_path, gen))
+            except OSError:
+                pass
+
+
+def load_latest(config_path):
+    """
+    载入最新的有效快照，返回 (代号, load() 的结果)；
+    没有有效快照时结果为 None，代号为已有的最大代号（新快照接着编号）
+    """
+    gens = generations(config_path)
+    for gen in gens:
+        loaded = load(snapshot_path(config_path, gen), config_path)
+        if loaded is not None:
+            remove_older(config_path, gen)
+            return gen, loaded
+    return (gens[0] if gens else 0), None
+
+
+def dumps(table, data, source_stat, digest, weights=None):
+    """
+    快照文件内容：MAGIC、头部长度、JSON 头部（来源文件、prizes 以外的字段、额外字段），
+    之后按 8 字节对齐依次是 offsets(Q) / counts(q) / slots(I) / [权重(d) / 树状数组(d)] / 字符串表
+    weights 为 WeightTree.arrays() 的结果，必须与 table 的数量和 data 中的最近记录、策略状态对应
+    """
+    header = json.dumps({
+        "source": {"size": source_stat.st_size, "mtime_ns": source_stat.st_mtime_ns},
+        "digest": digest,
+        "n": len(table),
+        "slots": len(table._slots),
+        "blob": len(table._blob),
+        "data": {k: v for k, v in data.items() if k != "prizes"},
+        "extras": {str(i): e for i, e in table._extras.items()},
+        "weights": weights is not None,
+    }, ensure_ascii=False).encode("utf8")
+    head = MAGIC + len(header).to_bytes(8, "little") + header
+    parts = [head, b"\0" * (-len(head) % 8)]
+    for values in (table._offsets, table.counts, table._slots, *(weights or ())):
+        raw = memoryview(values).cast("B")
+        parts.append(raw)
+        parts.append(b"\0" * (-len(raw) % 8))
+    parts.append(table._blob)
+    return b"".join(parts)
+
+
+def load(path, source_path):
+    """
+    映射快照文件，返回 (PrizeTable, prizes 以外的字段, prizes.json 的摘要, 权重树数组)，
+    没有存权重树时最后一项为 None
+    快照不存在、损坏或与 source_path 的大小 / 修改时间对不上时返回 None
+    映射为写时复制，抽奖修改的是内存中的副本，不会写回快照
+    """
+    try:
+        st = os.stat(source_path)
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError):
+        return None
+    try:
+        if mm[:8] != MAGIC:
+            return None
+        size = int.from_bytes(mm[8:16], "little")
+        header = json.loads(mm[16:16 + size])
+        source = header["source"]
+        if source["size"] != st.st_size or source["mtime_ns"] != st.st_mtime_ns:
+            return None
+
+        n, m, blob_size = header["n"], header["slots"], header["blob"]
+        view = memoryview(mm)
+        pos = _align(16 + size)
+        layout = [("Q", n + 1), ("q", n), ("I", m)]
+        if header.get("weights"):
+            layout += [("d", n), ("d", n + 1)]
+        sections = []
+        for code, count in layout:
+            end = pos + count * array(code).itemsize
+            section = view[pos:end].cast(code)
+            if len(section) != count:
+                return None
+            sections.append(section)
+            pos = _align(end)
+        blob = view[pos:pos + blob_size]
+        if len(blob) != blob_size:
+            return None
+    except (ValueError, KeyError, TypeError):
+        return None
+
+    offsets, counts, slots = sections[:3]
+    weights = tuple(sections[3:]) or None
+    extras = {int(i): e for i, e in header["extras"].items()}
+    return (PrizeTable(blob, offsets, counts, slots, extras), header["data"], header["digest"],
+            weights)
+
+
+def _align(pos):
+    return pos + (-pos % 8)
+
+
+def encode_json(data):
+    """
+    prizes 为 PrizeTable 的快照按 json.dumps(indent=4) 的格式编码成 bytes，
+    逐个奖品生成文本，不先换回 dict
+    """
+    table = data["prizes"]
+    rest = {k: v for k, v in data.items() if k != "prizes"}
+    lines = []
+    counts, extras = table.counts, table._extras
+    for i, name in enumerate(table.names):
+        key = json.dumps(name, ensure_ascii=False)
+        if i in extras:
+            body = json.dumps(dict(_Entry(table, i)), indent=4, ensure_ascii=False)
+            lines.append(f"        {key}: " + body.replace("\n", "\n        "))
+        else:
+            lines.append(f'        {key}: {{\n            "count": {counts[i]}\n        }}')
+
+    prizes = "{\n" + ",\n".join(lines) + "\n    }" if lines else "{}"
+    text = '{\n    "prizes": ' + prizes
+    if rest:
+        # 去掉外层花括号，接在 prizes 后面
+        text += ",\n" + json.dumps(rest, indent=4, ensure_ascii=False)[2:-2]
+    return (text + "\n}").encode("utf8")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.prize_snapshot",
+                                     description="把 prizes.json 编译成二进制快照")
+    parser.add_argument("config", nargs="?", default="config/prizes.json")
+    args = parser.parse_args(argv)
+
+    st = os.stat(args.config)
+    with open(args.config, "rb") as f:
+        raw = f.read()
+    data = json.loads(raw)
+    table = PrizeTable.build(data["prizes"])
+    gens = generations(args.config)
+    out = snapshot_path(args.config, (gens[0] if gens else 0) + 1)
+    tmp = out + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(dumps(table, data, st, hashlib.sha1(raw).hexdigest()))
+    os.replace(tmp, out)
+    remove_older(args.config, gens[0] + 1 if gens else 1)
+    print(json.dumps({"snapshot": out, "prizes": len(table)}, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+from array import array
+
+from core.weight_tree import WeightTree
+
+class Roster:
+    """
+    参与抽奖的人员名单，按人不放回地加权抽取
+
+    存放在 path 目录中，不为每个人建 dict：
+    people.bin  所有人的 "工号\\t姓名" (UTF-8) 首尾相接
+    offsets.Q   第 i 个人在 people.bin 中的起点（共 n + 1 个）
+    weights.d   每个人的权重
+    removed.I   已中奖（移出名单）的人的序号，按中奖顺序逐条追加
+
+    抽取用 WeightTree，中奖者权重置 0，都是 O(log n)
+    """
+
+    def __init__(self, path="config/roster"):
+        self.path = path
+        self._blob = b""
+        self._offsets = array("Q", [0])
+        self._weights = array("d")
+        self._removed = array("I")
+        self._tree = WeightTree()
+        self._left = 0  # 还能抽中的人数
+        self.load()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def load(self):
+        if not os.path.exists(self._file("offsets.Q")):
+            return
+        with open(self._file("people.bin"), "rb") as f:
+            self._blob = f.read()
+        self._offsets = _read_array("Q", self._file("offsets.Q"))
+        self._weights = _read_array("d", self._file("weights.d"))
+
+        removed_path = self._file("removed.I")
+        self._removed = _read_array("I", removed_path) if os.path.exists(removed_path) else array("I")
+        # 崩溃时可能写了半条
+        _truncate(removed_path, len(self._removed) * self._removed.itemsize)
+
+        self._rebuild()
+
+    def _rebuild(self):
+        weights = array("d", self._weights)
+        for i in self._removed:
+            weights[i] = 0.0
+        self._tree = WeightTree(weights)
+        self._left = sum(1 for w in weights if w > 0)
+
+    @classmethod
+    def import_csv(cls, csv_path, path="config/roster", id_col="id", name_col="name",
+                   weight_col="weight", encoding="utf-8-sig"):
+        """
+        从 CSV 逐行导入名单（表头需包含 id_col，name_col / weight_col 可选，权重缺省为 1），
+        替换 path 中原有的名单并清空中奖记录；返回新的 Roster
+        """
+        os.makedirs(path, exist_ok=True)
+        offsets = array("Q", [0])
+        weights = array("d")
+        pos = 0
+
+        people_tmp = os.path.join(path, "people.bin.tmp")
+        with open(csv_path, "r", encoding=encoding, newline="") as src, \
+                open(people_tmp, "wb") as out:
+            reader = csv.DictReader(src)
+            if id_col not in (reader.fieldnames or []):
+                raise ValueError(f"名单缺少列：{id_col}")
+            for row in reader:
+                person_id = (row.get(id_col) or "").strip()
+                if not person_id:
+                    continue
+                name = (row.get(name_col) or "").strip()
+                w = (row.get(weight_col) or "").strip()
+                weight = float(w) if w else 1.0
+                if weight < 0:
+                    raise ValueError(f"权重不能为负：{person_id}")
+
+                data = f"{person_id}\t{name}".replace("\n", " ").encode("utf8")
+                out.write(data)
+                pos += len(data)
+                offsets.append(pos)
+                weights.append(weight)
+
+        for name, values in (("offsets.Q", offsets), ("weights.d", weights)):
+            with open(os.path.join(path, name + ".tmp"), "wb") as f:
+                values.tofile(f)
+        # offsets.Q 最后替换：load() 以它判断名单是否存在
+        os.replace(people_tmp, os.path.join(path, "people.bin"))
+        os.replace(os.path.join(path, "weights.d.tmp"), os.path.join(path, "weights.d"))
+        open(os.path.join(path, "removed.I"), "wb").close()
+        os.replace(os.path.join(path, "offsets.Q.tmp"), os.path.join(path, "offsets.Q"))
+        return cls(path)
+
+    # ---------- 查询 ----------
+
+    def size(self):
+        """名单总人数"""
+        return len(self._weights)
+
+    def remaining(self):
+        """还能抽中的人数（未中奖且权重大于 0）"""
+        return self._left
+
+    def person(self, i):
+        """第 i 个人的 (工号, 姓名)"""
+        text = self._blob[self._offsets[i]:self._offsets[i + 1]].decode("utf8")
+        person_id, _, name = text.partition("\t")
+        return person_id, name
+
+    def label(self, i):
+        person_id, name = self.person(i)
+        return f"{name}（{person_id}）" if name else person_id
+
+    def winners(self):
+        """按中奖顺序的序号"""
+        return list(self._removed)
+
+    # ---------- 抽取 ----------
+
+    def draw(self, u=None):
+        """抽出一个人并移出名单，返回序号；没有人可抽时抛出 ValueError"""
+        return self.draw_many(1, None if u is None else [u])[0]
+
+    def draw_many(self, k, us=None):
+        """
+        不放回地连续抽 k 个人，中奖记录只追加写一次
+        人数不足 k 时抛出 ValueError，名单不变
+        """
+        tree = self._tree
+        picked = []
+        rand = random.random
+        for j in range(k):
+            total = tree.total()
+            if total <= 0:
+                for i in picked:
+                    tree.update(i, self._weights[i])
+                raise ValueError("名单中的人已全部抽完")
+            u = us[j] if us is not None else rand()
+            i = tree.find(u * total)
+            tree.update(i, 0.0)
+            picked.append(i)
+        self._left -= len(picked)
+
+        if picked:
+            values = array("I", picked)
+            os.makedirs(self.path, exist_ok=True)
+            with open(self._file("removed.I"), "ab") as f:
+                values.tofile(f)
+            self._removed.extend(values)
+        return picked
+
+    def reset(self):
+        """清空中奖记录，所有人重新参与"""
+        open(self._file("removed.I"), "wb").close()
+        self._removed = array("I")
+        self._rebuild()
+
+
+def _read_array(code, path):
+    values = array(code)
+    with open(path, "rb") as f:
+        raw = f.read()
+    values.frombytes(raw[:len(raw) // values.itemsize * values.itemsize])
+    return values
+
+
+def _truncate(path, size):
+    if os.path.exists(path) and os.path.getsize(path) != size:
+        with open(path, "r+b") as f:
+            f.truncate(size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.roster", description="导入抽奖名单")
+    parser.add_argument("csv", help="名单 CSV（UTF-8，含表头）")
+    parser.add_argument("--dir", default="config/roster", help="名单保存目录")
+    parser.add_argument("--id-col", default="id")
+    parser.add_argument("--name-col", default="name")
+    parser.add_argument("--weight-col", default="weight")
+    args = parser.parse_args(argv)
+
+    roster = Roster.import_csv(args.csv, args.dir, args.id_col, args.name_col, args.weight_col)
+    print(json.dumps({"dir": args.dir, "people": roster.size()}, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
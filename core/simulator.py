@@ -0,0 +1,230 @@
+"""
+活动前的蒙特卡洛模拟：按当前配置把整场活动（直到奖品全部抽完）重放很多次
+
+    python -m core.simulator --replays 100000 --workers 8 --seed 1 --output sim.json
+
+统计每个奖品抽完的时间分布、重复率（连续两次 / 三次相同）、
+rare/normal/single 动画比例，以及“仍有库存的奖品数”随活动进度的曲线
+重放按固定大小分块，每块的随机种子只由 --seed 和块号决定，结果与进程数无关
+"""
+import argparse
+import json
+import math
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from core.prize_manager import PrizeManager
+from core.animation_manager import AnimationManager
+
+
+def _run_chunk(task):
+    """在一个进程里跑一块重放，返回可直接相加的汇总"""
+    data, anim_probs, replays, seed, bins = task
+
+    # PrizeManager 用模块级 random
+    random.seed(seed)
+    rng = random.Random(seed + 1)
+    rand = rng.random
+
+    names = list(data["prizes"])
+    index = {name: i for i, name in enumerate(names)}
+    start_counts = [data["prizes"][name]["count"] for name in names]
+    total = sum(c for c in start_counts if c > 0)
+    n = len(names)
+
+    # 动画类型的累积概率
+    anim_types = list(anim_probs)
+    cum = []
+    acc = 0.0
+    for t in anim_types:
+        acc += anim_probs[t]
+        cum.append(acc)
+
+    depletion_sum = [0] * n
+    depletion_hist = [[0] * bins for _ in range(n)]
+    in_stock_curve = [0] * bins
+    repeats = triples = 0
+    anim_counts = [0] * len(anim_types)
+    rare_sum = rare_sq = 0
+    rare_i = anim_types.index("rare") if "rare" in anim_types else -1
+
+    for _ in range(replays):
+        pm = PrizeManager(None, data=dict(
+            data,
+            prizes={name: {"count": c} for name, c in zip(names, start_counts)},
+            recent=list(data.get("recent", [])),
+        ))
+        seq = pm.draw_many(total)
+
+        remaining = list(start_counts)
+        in_stock = sum(1 for c in remaining if c > 0)
+        prev = prev2 = None
+        rare = 0
+        next_bin = 0
+        for step, name in enumerate(seq):
+            # 进度曲线：每个分箱起点记录一次
+            while next_bin < bins and step >= next_bin * total / bins:
+                in_stock_curve[next_bin] += in_stock
+                next_bin += 1
+
+            i = index[name]
+            remaining[i] -= 1
+            if remaining[i] == 0:
+                in_stock -= 1
+                depletion_sum[i] += step + 1
+                depletion_hist[i][min(bins - 1, step * bins // total)] += 1
+
+            if name == prev:
+                repeats += 1
+                if name == prev2:
+                    triples += 1
+            prev2, prev = prev, name
+
+            if cum:
+                u = rand() * acc
+                k = 0
+                while k < len(cum) - 1 and u >= cum[k]:
+                    k += 1
+                anim_counts[k] += 1
+                if k == rare_i:
+                    rare += 1
+
+        rare_sum += rare
+        rare_sq += rare * rare
+
+    return {
+        "replays": replays,
+        "depletion_sum": depletion_sum,
+        "depletion_hist": depletion_hist,
+        "in_stock_curve": in_stock_curve,
+        "repeats": repeats,
+        "triples": triples,
+        "anim_counts": anim_counts,
+        "rare_sum": rare_sum,
+        "rare_sq": rare_sq,
+    }
+
+
+def _merge(a, b):
+    if a is None:
+        return b
+    a["replays"] += b["replays"]
+    for key in ("repeats", "triples", "rare_sum", "rare_sq"):
+        a[key] += b[key]
+    for key in ("depletion_sum", "in_stock_curve", "anim_counts"):
+        a[key] = [x + y for x, y in zip(a[key], b[key])]
+    a["depletion_hist"] = [[x + y for x, y in zip(ha, hb)]
+                           for ha, hb in zip(a["depletion_hist"], b["depletion_hist"])]
+    return a
+
+
+def _hist_percentile(hist, q, total_draws, bins):
+    """从分箱直方图估计分位数，返回抽奖序号（分箱中点）"""
+    count = sum(hist)
+    if count == 0:
+        return None
+    target = q * count
+    acc = 0
+    for b, c in enumerate(hist):
+        acc += c
+        if acc >= target:
+            return (b + 0.5) * total_draws / bins
+    return total_draws
+
+
+def animation_probabilities(am):
+    choices, weights = am.weighted_choices()
+    probs = {}
+    for (anim_type, _), w in zip(choices, weights):
+        probs[anim_type] = probs.get(anim_type, 0.0) + w
+    return probs
+
+
+def simulate(data, anim_probs, replays, seed=0, workers=1, chunk=200, bins=50):
+    """
+    data：prizes.json 格式的 dict；anim_probs：{动画类型: 概率}
+    返回统计结果 dict
+    """
+    if replays <= 0:
+        raise ValueError("replays 必须大于 0")
+
+    tasks = []
+    for i in range(math.ceil(replays / chunk)):
+        size = min(chunk, replays - i * chunk)
+        tasks.append((data, anim_probs, size, seed * 1000003 + i, bins))
+
+    merged = None
+    if workers <= 1:
+        for task in tasks:
+            merged = _merge(merged, _run_chunk(task))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(_run_chunk, tasks):
+                merged = _merge(merged, part)
+
+    names = list(data["prizes"])
+    total = sum(max(0, p["count"]) for p in data["prizes"].values())
+    draws = merged["replays"] * total
+
+    prizes = {}
+    for i, name in enumerate(names):
+        hist = merged["depletion_hist"][i]
+        done = sum(hist)
+        prizes[name] = {
+            "depletion_mean": merged["depletion_sum"][i] / done if done else None,
+            "depletion_p5": _hist_percentile(hist, 0.05, total, bins),
+            "depletion_p50": _hist_percentile(hist, 0.50, total, bins),
+            "depletion_p95": _hist_percentile(hist, 0.95, total, bins),
+        }
+
+    anim_total = sum(merged["anim_counts"]) or 1
+    rare_mean = merged["rare_sum"] / merged["replays"]
+    rare_var = max(0.0, merged["rare_sq"] / merged["replays"] - rare_mean ** 2)
+
+    return {
+        "replays": merged["replays"],
+        "seed": seed,
+        "draws_per_event": total,
+        "repeat_rate": merged["repeats"] / draws if draws else 0.0,
+        "triple_rate": merged["triples"] / draws if draws else 0.0,
+        "animation": {t: c / anim_total for t, c in zip(anim_probs, merged["anim_counts"])},
+        "rare_per_event": {"mean": rare_mean, "std": math.sqrt(rare_var)},
+        "prizes": prizes,
+        "in_stock_curve": [
+            {"progress": b / bins, "mean_in_stock": c / merged["replays"]}
+            for b, c in enumerate(merged["in_stock_curve"])
+        ],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m core.simulator", description="抽奖规则蒙特卡洛模拟")
+    parser.add_argument("--config", default="config/prizes.json", help="奖品配置 prizes.json")
+    parser.add_argument("--animations", default="config/animation_slots.json", help="动画配置 animation_slots.json")
+    parser.add_argument("--replays", type=int, default=10000, help="重放整场活动的次数")
+    parser.add_argument("--workers", type=int, default=1, help="进程数")
+    parser.add_argument("--chunk", type=int, default=200, help="每个任务的重放次数")
+    parser.add_argument("--bins", type=int, default=50, help="进度分箱数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="结果写入 JSON 文件（默认输出到 stdout）")
+    args = parser.parse_args(argv)
+
+    # 通过 PrizeManager 载入，日志模式下也能拿到当前库存和策略状态
+    data = PrizeManager(args.config).snapshot_data()
+    anim_probs = animation_probabilities(AnimationManager(args.animations))
+
+    result = simulate(data, anim_probs, args.replays, seed=args.seed,
+                      workers=args.workers, chunk=args.chunk, bins=args.bins)
+
+    text = json.dumps(result, indent=4, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
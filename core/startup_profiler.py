@@ -0,0 +1,46 @@
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+class StartupProfiler:
+    """
+    记录启动各阶段耗时：
+        with profiler.phase("imports"): ...
+        profiler.mark("first_frame")
+    设置环境变量 LOTTERY_PROFILE_STARTUP=1 或带 --profile-startup 启动时输出报告
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.phases = []   # (name, 开始时刻, 耗时)，时刻相对 t0
+        self.marks = {}    # {name: 时刻}
+        self.enabled = (os.environ.get("LOTTERY_PROFILE_STARTUP") == "1"
+                        or "--profile-startup" in sys.argv)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.phases.append((name, start - self.t0, end - start))
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.t0
+
+    def report(self, out=None):
+        if not self.enabled:
+            return
+        out = out or sys.stderr
+        print("启动耗时：", file=out)
+        for name, start, elapsed in self.phases:
+            print(f"  {name:<20} {elapsed * 1000:8.1f} ms  (起点 {start * 1000:8.1f} ms)", file=out)
+        for name, at in self.marks.items():
+            print(f"  {name:<20} @ {at * 1000:8.1f} ms", file=out)
+
+
+# 进程内共用一个
+profiler = StartupProfiler()
@@ -0,0 +1,111 @@
+import hashlib
+import os
+import shutil
+import subprocess
+import threading
+from collections import deque
+
+class ThumbnailCache:
+    """
+    动画文件的封面缩略图（PNG），保存在 cache_dir 中，文件名由路径、大小、mtime 和尺寸决定，
+    视频被替换后自动换成新的缩略图
+
+    get() 只查内存，不访问文件系统；没有时用 request() 交给后台线程：
+    先找磁盘缓存，没有再用 ffmpeg 截取一帧。最多 workers 个线程，
+    等待中的请求最多 max_pending 个，新请求优先（滚动列表时先处理可见的行）
+    """
+
+    def __init__(self, cache_dir="config/thumbnails", width=160, workers=2, max_pending=256):
+        self.cache_dir = cache_dir
+        self.width = width
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ffmpeg = shutil.which("ffmpeg")
+
+        self._done = {}        # {file: 缩略图路径 / None（无法生成）}
+        self._pending = deque()  # (file, callback)
+        self._queued = set()
+        self._threads = []
+        self._cond = threading.Condition()
+
+    def get(self, file):
+        """已生成的缩略图路径；还没有或无法生成时为 None"""
+        return self._done.get(file)
+
+    def known(self, file):
+        return file in self._done
+
+    def invalidate(self):
+        """忘掉内存中的结果（磁盘缓存保留），下次 request 时重新检查文件"""
+        self._done = {}
+
+    def request(self, file, callback=None):
+        """后台生成 file 的缩略图，完成后在工作线程中调用 callback(file, path 或 None)"""
+        with self._cond:
+            if file in self._queued:
+                return
+            self._queued.add(file)
+            self._pending.append((file, callback))
+            while len(self._pending) > self.max_pending:
+                # 丢掉最早的请求，之后再次可见时会重新请求
+                self._queued.discard(self._pending.popleft()[0])
+
+            if len(self._threads) < self.workers:
+                t = threading.Thread(target=self._run, name="thumbnails", daemon=True)
+                self._threads.append(t)
+                t.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._pending:
+                    # 空闲一会儿就退出，需要时再启动
+                    self._cond.wait(5.0)
+                    if not self._pending:
+                        self._threads.remove(threading.current_thread())
+                        return
+                file, callback = self._pending.pop()
+
+            path = self._make(file)
+            self._done[file] = path
+            with self._cond:
+                self._queued.discard(file)
+            if callback is not None:
+                callback(file, path)
+
+    def cache_path(self, file, st):
+        key = f"{os.path.abspath(file)}|{st.st_size}|{st.st_mtime_ns}|{self.width}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode("utf8")).hexdigest() + ".png")
+
+    def _make(self, file):
+        try:
+            st = os.stat(file)
+        except OSError:
+            return None
+
+        path = self.cache_path(file, st)
+        if os.path.exists(path):
+            return path
+        if self.ffmpeg is None:
+            return None
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = path[:-4] + ".tmp.png"
+        # 取第 1 秒的画面（太短的视频取第一帧）
+        for seek in ("1", "0"):
+            try:
+                subprocess.run(
+                    [self.ffmpeg, "-v", "error", "-y", "-ss", seek, "-i", file,
+                     "-frames:v", "1", "-vf", f"scale={self.width}:-2", tmp_path],
+                    capture_output=True, timeout=20, check=True)
+            except (OSError, subprocess.SubprocessError):
+                continue
+            if os.path.exists(tmp_path) and os.path.getsize(tmp_path) > 0:
+                os.replace(tmp_path, path)
+                return path
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return None
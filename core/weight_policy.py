@@ -0,0 +1,229 @@
+import time
+from array import array
+
+class WeightPolicy:
+    """
+    权重策略基类
+
+    载入时 bind() 编译出按奖品下标的乘数表 self.table，
+    之后每次抽奖 on_draw() 只修改受影响的下标并返回它们
+    奖品最终权重 = 有库存 ? 所有策略乘数之积 : 0
+    """
+
+    timed = False      # 为 True 时每次抽样前调用 refresh()
+    relaxable = False  # 为 True 时，所有有库存的奖品权重都为 0 的情况下抽样会忽略这个策略
+
+    def bind(self, pm):
+        self.table = array("d", [1.0]) * len(pm._names)
+
+    def on_draw(self, pm, i, last, evicted):
+        """
+        pm 的库存、recent、窗口计数已经更新
+        i → 抽中奖品的下标；last → 此前最后一次抽中的下标；evicted → 被挤出窗口的下标
+        （都可能为 None）。返回乘数发生变化的下标
+        """
+        return ()
+
+    def on_undo(self, pm, i, last, evicted):
+        """撤销一次抽取后调用：pm 已恢复、自身状态已 restore；last 为恢复后的最后一个"""
+        return ()
+
+    def refresh(self, pm):
+        """与时间有关的策略在这里更新，返回乘数发生变化的下标"""
+        return ()
+
+    def state(self):
+        """需要随快照保存的状态（JSON 可序列化），没有则为 None"""
+        return None
+
+    def restore(self, state):
+        pass
+
+    def _targets(self, pm, prizes):
+        return {pm._index[name] for name in prizes if name in pm._index}
+
+
+class DefaultPolicy(WeightPolicy):
+    """原有规则：最近窗口内没出现 → 1.5 倍；最近连续两次 → 0.3 倍"""
+
+    def bind(self, pm):
+        # 窗口里没有的奖品都是 1.5，只需逐个计算窗口里出现过的
+        self.table = array("d", [1.5]) * len(pm._names)
+        for name in pm._freq:
+            j = pm._index.get(name)
+            if j is not None:
+                self.table[j] = self._value(pm, j)
+
+    def _value(self, pm, j):
+        name = pm._names[j]
+        base = 1.0
+
+        # 没出现 → 增加
+        if pm._freq.get(name, 0) == 0:
+            base *= 1.5
+
+        # 连续两次 → 降低
+        recent = pm.recent
+        if len(recent) >= 2 and recent[-1] == name and recent[-2] == name:
+            base *= 0.3
+
+        return base
+
+    def on_draw(self, pm, i, last, evicted):
+        changed = []
+        table = self.table
+        for j in (i, last, evicted):
+            if j is not None:
+                v = self._value(pm, j)
+                if v != table[j]:
+                    table[j] = v
+                    changed.append(j)
+        return changed
+
+    on_undo = on_draw
+
+
+class CapPolicy(WeightPolicy):
+    """
+    最近窗口内已出现 max 次的奖品暂停（乘数 0）；不写 prizes 时对所有奖品生效
+    剩下有库存的奖品全被暂停时不再限制，照常抽取（而不是当作抽完）
+    """
+
+    relaxable = True
+
+    def __init__(self, max, prizes=None):
+        self.max = max
+        self.prizes = prizes
+
+    def bind(self, pm):
+        self._only = None if self.prizes is None else self._targets(pm, self.prizes)
+        # 只有窗口里出现过的奖品可能被暂停
+        self.table = array("d", [1.0]) * len(pm._names)
+        for name in pm._freq:
+            j = pm._index.get(name)
+            if j is not None:
+                self.table[j] = self._value(pm, j)
+
+    def _value(self, pm, j):
+        if self._only is not None and j not in self._only:
+            return 1.0
+        return 0.0 if pm._freq.get(pm._names[j], 0) >= self.max else 1.0
+
+    def on_draw(self, pm, i, last, evicted):
+        changed = []
+        for j in (i, evicted):
+            if j is not None:
+                v = self._value(pm, j)
+                if v != self.table[j]:
+                    self.table[j] = v
+                    changed.append(j)
+        return changed
+
+    on_undo = on_draw
+
+
+class PityPolicy(WeightPolicy):
+    """连续 after 次没有抽到 prizes 中任何一个时，这些奖品乘以 factor，抽中后复原"""
+
+    def __init__(self, prizes, after, factor=3.0):
+        self.prizes = prizes
+        self.after = after
+        self.factor = factor
+        self.misses = 0
+
+    def bind(self, pm):
+        self._set = self._targets(pm, self.prizes)
+        self.table = array("d", [1.0]) * len(pm._names)
+        self._apply()
+
+    def _apply(self):
+        """按 misses 设置目标奖品的乘数，返回变化的下标"""
+        v = self.factor if self.misses >= self.after else 1.0
+        if not self._set or self.table[next(iter(self._set))] == v:
+            return ()
+        for j in self._set:
+            self.table[j] = v
+        return self._set
+
+    def on_draw(self, pm, i, last, evicted):
+        self.misses = 0 if i in self._set else self.misses + 1
+        return self._apply()
+
+    def on_undo(self, pm, i, last, evicted):
+        return self._apply()
+
+    def state(self):
+        return self.misses
+
+    def restore(self, state):
+        self.misses = state or 0
+
+
+class GuaranteePolicy(PityPolicy):
+    """每 every 次至少抽中一次 prizes 中的奖品（有库存时）"""
+
+    def __init__(self, prizes, every):
+        super().__init__(prizes, after=every - 1, factor=1e9)
+
+
+class TimeBoostPolicy(WeightPolicy):
+    """每天 hours = [开始, 结束) 时段内 prizes 乘以 factor，可以跨午夜"""
+
+    timed = True
+
+    def __init__(self, prizes, hours, factor=2.0, clock=time.localtime):
+        self.prizes = prizes
+        self.start, self.end = hours
+        self.factor = factor
+        self.clock = clock
+
+    def _active(self):
+        h = self.clock().tm_hour
+        if self.start <= self.end:
+            return self.start <= h < self.end
+        return h >= self.start or h < self.end
+
+    def bind(self, pm):
+        self._set = self._targets(pm, self.prizes)
+        self.table = array("d", [1.0]) * len(pm._names)
+        self._on = False
+        self.refresh(pm)
+
+    def refresh(self, pm):
+        on = self._active()
+        if on == self._on:
+            return ()
+        self._on = on
+        v = self.factor if on else 1.0
+        for j in self._set:
+            self.table[j] = v
+        return self._set
+
+
+POLICY_TYPES = {
+    "default": DefaultPolicy,
+    "cap": CapPolicy,
+    "pity": PityPolicy,
+    "guarantee": GuaranteePolicy,
+    "time_boost": TimeBoostPolicy,
+}
+
+
+def build_policies(specs):
+    """
+    按 prizes.json 的 "policies" 创建策略，例如
+        [{"type": "default"}, {"type": "pity", "prizes": ["奖品A"], "after": 20, "factor": 3}]
+    没有配置时只用 default
+    """
+    if specs is None:
+        return [DefaultPolicy()]
+
+    policies = []
+    for spec in specs:
+        spec = dict(spec)
+        kind = spec.pop("type", None)
+        cls = POLICY_TYPES.get(kind)
+        if cls is None:
+            raise ValueError(f"未知的权重策略：{kind}")
+        policies.append(cls(**spec))
+    return policies
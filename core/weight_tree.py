@@ -0,0 +1,106 @@
+from array import array
+
+class WeightTree:
+    """
+    树状数组（Fenwick Tree）
+    单点修改权重、按前缀和抽样，都是 O(log n)
+
+    compact=True 时用 array("d") 存放，每个下标 16 字节（list 约 64 字节），
+    访问稍慢，给奖品种类很多的场合用
+    """
+
+    def __init__(self, weights=(), compact=False):
+        if compact:
+            self._w = array("d", weights)
+        else:
+            self._w = [float(w) for w in weights]   # 每个下标的当前权重
+        n = len(self._w)
+
+        # O(n) 建树
+        tree = array("d", bytes(8 * (n + 1))) if compact else [0.0] * (n + 1)
+        for i in range(1, n + 1):
+            tree[i] += self._w[i - 1]
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self._tree = tree
+        self._init_totals()
+
+    @classmethod
+    def from_arrays(cls, weights, tree):
+        """直接使用建好的数组（如 arrays() 的结果或映射的快照），不重新建树"""
+        self = cls.__new__(cls)
+        self._w = weights
+        self._tree = tree
+        self._init_totals()
+        return self
+
+    def _init_totals(self):
+        self._total = sum(self._w)
+        self._top = 1
+        while self._top * 2 <= len(self._w):
+            self._top *= 2
+
+    def arrays(self):
+        """(权重, 树状数组) 的 array("d") 副本"""
+        return _copy(self._w), _copy(self._tree)
+
+    def __len__(self):
+        return len(self._w)
+
+    def get(self, i):
+        return self._w[i]
+
+    def update(self, i, w):
+        delta = w - self._w[i]
+        if delta == 0:
+            return
+        self._w[i] = w
+        self._total += delta
+
+        tree = self._tree
+        n = len(self._w)
+        i += 1
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def total(self):
+        # 全部为 0 时避免浮点残差
+        return self._total if self._total > 1e-9 else 0.0
+
+    def find(self, u):
+        """返回前缀和首次超过 u 的下标（0 ≤ u < total）"""
+        tree = self._tree
+        n = len(self._w)
+        pos = 0
+        bit = self._top
+        while bit:
+            nxt = pos + bit
+            if nxt <= n and tree[nxt] <= u:
+                u -= tree[nxt]
+                pos = nxt
+            bit >>= 1
+
+        # 浮点误差可能落到末尾或 0 权重上，就近找一个有效下标
+        if pos >= n:
+            pos = n - 1
+        w = self._w
+        if w[pos] <= 0:
+            j = pos
+            while j < n and w[j] <= 0:
+                j += 1
+            if j == n:
+                j = pos
+                while j > 0 and w[j] <= 0:
+                    j -= 1
+            pos = j
+        return pos
+
+
+def _copy(values):
+    if isinstance(values, list):
+        return array("d", values)
+    copy = array("d")
+    copy.frombytes(memoryview(values).cast("B"))
+    return copy
@@ -1,12 +1,28 @@
 # main.py
 import sys
-from PySide6.QtWidgets import QApplication
-from ui.main_window import MainWindow
-from core.config_manager import ConfigManager
+import argparse
+from core.startup_profiler import profiler
+from core.metrics import metrics
+
+with profiler.phase("imports"):
+    from PySide6.QtWidgets import QApplication
+    from ui.main_window import MainWindow
 
 if __name__ == "__main__":
-    ConfigManager.ensure_default()
-    app = QApplication(sys.argv)
-    main = MainWindow()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--server", default=None,
+                        help="共用库存的抽奖服务地址 host:port 或 unix:/path")
+    parser.add_argument("--profile-startup", action="store_true")
+    parser.add_argument("--metrics", default=None,
+                        help="定期导出埋点数据的文件（.prom 为 Prometheus 文本格式，否则 JSON）")
+    args, qt_args = parser.parse_known_args()
+    if args.metrics:
+        metrics.enable(args.metrics)
+
+    with profiler.phase("qapplication"):
+        app = QApplication(sys.argv[:1] + qt_args)
+    main = MainWindow(server=args.server)
     main.show()
-    sys.exit(app.exec())
+    code = app.exec()
+    metrics.close()
+    sys.exit(code)
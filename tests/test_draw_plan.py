@@ -0,0 +1,121 @@
+import json
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+
+from core import draw_plan
+from core.persistence import writer
+from core.prize_manager import PrizeManager
+
+
+def longest_run(seq):
+    best = run = 0
+    for i, x in enumerate(seq):
+        run = run + 1 if i and seq[i - 1] == x else 1
+        best = max(best, run)
+    return best
+
+
+class GenerateTest(unittest.TestCase):
+
+    def test_respects_max_run(self):
+        rng = random.Random(3)
+        for max_run in (1, 2, 3):
+            for _ in range(50):
+                counts = [rng.randint(0, 12) for _ in range(rng.randint(2, 6))]
+                # 只在排得开时检查：最多的奖品不超过 max_run × (其余 + 1)
+                m = max(counts)
+                if m > max_run * (sum(counts) - m + 1):
+                    continue
+                plan = draw_plan.generate(counts, max_run, rand=rng.random)
+                self.assertEqual(Counter(plan), Counter({i: c for i, c in enumerate(counts) if c}))
+                self.assertLessEqual(longest_run(list(plan)), max_run, msg=(counts, max_run))
+
+    def test_continues_previous_run(self):
+        rng = random.Random(5)
+        for _ in range(50):
+            plan = draw_plan.generate([5, 5, 5], 2, last=0, run=2, rand=rng.random)
+            self.assertNotEqual(plan[0], 0)
+            self.assertLessEqual(longest_run([0, 0, *plan]), 2)
+
+
+class PlanModeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.addCleanup(writer.flush)  # 删除目录前等写线程写完
+        self.path = os.path.join(self.dir, "prizes.json")
+        self.data = {"prizes": {"A": {"count": 8}, "B": {"count": 5}, "C": {"count": 3}},
+                     "recent": [], "plan": {"max_run": 2}}
+        self.write(self.data)
+
+    def write(self, data):
+        with open(self.path, "w", encoding="utf8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    def load(self):
+        writer.flush()
+        return PrizeManager(self.path)
+
+    def planned(self, pm):
+        """尚未抽出的计划顺序"""
+        return [pm._plan_names[i] for i in pm._plan[pm._plan_pos:]]
+
+    def test_draws_follow_plan_within_max_run(self):
+        pm = self.load()
+        expected = self.planned(pm)
+        results = [pm.draw_prize() for _ in range(16)]
+        self.assertEqual(results, expected)
+        self.assertLessEqual(longest_run(results), 2)
+        self.assertRaises(ValueError, pm.draw_prize)
+
+    def test_plan_pos_resumes_after_reload(self):
+        pm = self.load()
+        expected = self.planned(pm)
+        first = [pm.draw_prize() for _ in range(6)]
+        first += pm.draw_many(3)
+        writer.flush()
+        with open(pm.plan_path, "rb") as f:
+            plan_file = f.read()
+
+        loaded = self.load()
+        self.assertEqual(loaded._plan_pos, 9)
+        rest = loaded.draw_many(100)
+        self.assertEqual(first + rest, expected)
+        writer.flush()
+        with open(pm.plan_path, "rb") as f:
+            self.assertEqual(f.read(), plan_file)  # 接着抽，没有重新生成
+
+    def test_stock_edit_replans(self):
+        pm = self.load()
+        drawn = pm.draw_many(4)
+
+        # 运行中修改库存
+        old = json.loads(json.dumps(pm.snapshot_data()))
+        new = json.loads(json.dumps(old))
+        new["prizes"]["C"]["count"] += 6
+        pm.apply_changes(old, new)
+        left = {name: p["count"] for name, p in pm.prizes.items() if p["count"] > 0}
+        self.assertEqual(Counter(self.planned(pm)), left)
+        self.assertLessEqual(longest_run(drawn + self.planned(pm)), 2)
+
+        # 没运行时修改：prizes.plan 与库存对不上，不能照着旧计划抽
+        writer.flush()
+        data = pm.snapshot_data()
+        data["prizes"]["A"]["count"] = 0
+        data["prizes"]["D"] = {"count": 4}
+        self.write(data)
+        loaded = self.load()
+        left = {name: p["count"] for name, p in loaded.prizes.items() if p["count"] > 0}
+        self.assertEqual(Counter(self.planned(loaded)), left)
+        results = loaded.draw_many(100)
+        self.assertEqual(Counter(results), left)
+        self.assertLessEqual(longest_run(drawn + results), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
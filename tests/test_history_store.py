@@ -0,0 +1,119 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from collections import Counter
+from datetime import datetime
+
+from core.history_store import HistoryStore
+
+T0 = 1700000000.0  # 整点之后的某个时刻
+
+
+def hour_iso(t):
+    return datetime.fromtimestamp(int(t // 3600) * 3600).isoformat(timespec="minutes")
+
+
+class HistoryStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, "history")
+
+    def open(self):
+        store = HistoryStore(self.path)
+        self.addCleanup(store.close)
+        return store
+
+    def fill(self, store, n=400, seed=1, t=T0):
+        """写入跨越多个小时（中间有空着的小时）的记录，返回 [(t, prize, kiosk, anim, winner)]"""
+        rng = random.Random(seed)
+        records = []
+        while len(records) < n:
+            t += rng.choice([1, 30, 600, 3 * 3600])
+            k = rng.randint(1, 3)
+            prizes = [rng.choice("ABC") for _ in range(k)]
+            kiosk = rng.choice(["", "k1", "k2"])
+            anim = rng.choice([None, "a.mp4"])
+            winners = [f"w{rng.randrange(50)}" for _ in range(k)] if rng.random() < 0.5 else None
+            store.append_many(prizes, kiosk, anim, t, winners)
+            for i, p in enumerate(prizes):
+                records.append((t, p, kiosk, anim or "", winners[i] if winners else ""))
+        return records
+
+    def expected(self, records, by, start=None, end=None, prize=None, kiosk=None):
+        counter = Counter()
+        for t, p, k, a, w in records:
+            if (start is not None and t < start) or (end is not None and t >= end):
+                continue
+            if (prize is not None and p != prize) or (kiosk is not None and k != kiosk):
+                continue
+            counter[{"prize": p, "kiosk": k, "anim": a, "winner": w, "hour": hour_iso(t)}[by]] += 1
+        return dict(counter)
+
+    def assertQueries(self, store, records):
+        self.assertEqual(store.count, len(records))
+        self.assertEqual([r[1:] for r in store.iter_records()],
+                         [(t, p, k, a, w) for t, p, k, a, w in records])
+
+        times = [r[0] for r in records]
+        bounds = [None, T0, times[len(times) // 3], times[len(times) // 2] + 1,
+                  times[-1] - 1800, times[-1] + 7200]
+        for start in bounds:
+            for end in bounds:
+                for by in ("prize", "kiosk", "anim", "winner", "hour"):
+                    self.assertEqual(store.counts(by, start, end),
+                                     self.expected(records, by, start, end), msg=(by, start, end))
+                self.assertEqual(store.counts("hour", start, end, prize="A", kiosk="k1"),
+                                 self.expected(records, "hour", start, end, "A", "k1"))
+
+    def test_round_trip(self):
+        store = self.open()
+        records = self.fill(store)
+        self.assertQueries(store, records)
+        store.close()
+
+        reopened = self.open()
+        self.assertQueries(reopened, records)
+        records += self.fill(reopened, 50, seed=2, t=records[-1][0])
+        self.assertQueries(reopened, records)
+
+    def test_torn_tail_is_truncated(self):
+        store = self.open()
+        records = self.fill(store)
+        store.close()
+
+        # 最后一批写到一半时崩溃：一列少了一条，一列多了半条，字符串表多了半行
+        with open(os.path.join(self.path, "prizes.I"), "r+b") as f:
+            f.truncate(os.path.getsize(f.name) - 4)
+        with open(os.path.join(self.path, "times.d"), "ab") as f:
+            f.write(b"\0\0\0")
+        with open(os.path.join(self.path, "strings.jsonl"), "ab") as f:
+            f.write(b'"half')
+        with open(os.path.join(self.path, "hours.q"), "ab") as f:
+            f.write(b"\0" * 8)
+
+        reopened = self.open()
+        records = records[:-1]
+        self.assertQueries(reopened, records)
+
+        # 截断后继续追加，再次打开仍然一致
+        reopened.append("D", "k9", "b.mp4", records[-1][0] + 4 * 3600, "w1")
+        records.append((records[-1][0] + 4 * 3600, "D", "k9", "b.mp4", "w1"))
+        reopened.close()
+        self.assertQueries(self.open(), records)
+
+    def test_old_directory_without_winners(self):
+        store = self.open()
+        records = self.fill(store, 20)
+        store.close()
+        os.remove(os.path.join(self.path, "winners.I"))
+
+        reopened = self.open()
+        self.assertQueries(reopened, [(t, p, k, a, "") for t, p, k, a, _ in records])
+
+
+if __name__ == "__main__":
+    unittest.main()
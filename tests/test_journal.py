@@ -0,0 +1,108 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.persistence import writer
+from core.prize_manager import PrizeManager
+
+
+class JournalTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.addCleanup(writer.flush)  # 删除目录前等写线程写完
+        self.path = os.path.join(self.dir, "prizes.json")
+        with open(self.path, "w", encoding="utf8") as f:
+            json.dump({"prizes": {"A": {"count": 20}, "B": {"count": 20}, "C": {"count": 20}},
+                       "recent": [], "persistence": "journal", "compact_every": 1000}, f)
+        self.pm = PrizeManager(self.path)
+        self.journal = self.pm.journal_path
+        self.old = self.journal + ".old"
+
+    def assertReloads(self, pm):
+        """重新载入后的状态必须与抽奖进程中的状态一致"""
+        writer.flush()
+        loaded = PrizeManager(self.path)
+        self.assertEqual(loaded.snapshot_data(), pm.snapshot_data())
+        self.assertEqual(loaded._seq, pm._seq)
+        return loaded
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def test_replay_after_rotation(self):
+        self.pm.draw_many(5)
+        self.pm.save()
+        writer.flush()
+        self.assertFalse(os.path.exists(self.old))
+        self.assertEqual(json.loads(self.read(self.path))["journal_seq"], 5)
+
+        self.pm.draw_many(3)
+        self.assertEqual([json.loads(line)["s"] for line in self.read(self.journal).splitlines()],
+                         [6, 7, 8])
+        self.assertReloads(self.pm)
+
+    def test_compaction_after_compact_every_draws(self):
+        self.pm.compact_every = 4
+        self.pm.draw_many(3)
+        self.pm.draw_many(2)
+        writer.flush()
+        self.assertFalse(os.path.exists(self.journal))
+        self.assertEqual(self.pm._journal_size, 0)
+        self.assertReloads(self.pm)
+
+    def test_torn_last_line_is_truncated(self):
+        self.pm.draw_many(4)
+        good = self.read(self.journal)
+        with open(self.journal, "ab") as f:
+            f.write(b'{"s":5,"d":"A')  # 写到一半崩溃
+
+        loaded = self.assertReloads(self.pm)
+        self.assertEqual(self.read(self.journal), good)
+
+        # 截断后追加的记录从整行开始，下次仍能全部重放
+        loaded.draw_many(3)
+        self.assertEqual(len(self.read(self.journal).splitlines()), 7)
+        self.assertReloads(loaded)
+
+    def test_crash_before_snapshot_written(self):
+        self.pm.draw_many(5)
+        stale = self.read(self.path)
+        rotated = self.read(self.journal)
+        self.pm.save()
+        writer.flush()
+
+        # 日志已换成 .old，快照没写出：旧快照 + .old + 新日志
+        with open(self.path, "wb") as f:
+            f.write(stale)
+        with open(self.old, "wb") as f:
+            f.write(rotated)
+        self.pm.draw_many(3)
+        self.assertReloads(self.pm)
+
+    def test_crash_after_snapshot_written(self):
+        self.pm.draw_many(5)
+        rotated = self.read(self.journal)
+        self.pm.save()
+        writer.flush()
+
+        # 快照已包含 .old 中的记录，但 .old 还没删掉：按序号跳过，不能重复扣库存
+        with open(self.old, "wb") as f:
+            f.write(rotated)
+        self.pm.draw_many(3)
+        loaded = self.assertReloads(self.pm)
+        self.assertEqual(sum(p["count"] for p in loaded.prizes.values()), 60 - 8)
+
+        # 下一次压缩把残留的 .old 一起处理掉
+        loaded.save()
+        writer.flush()
+        self.assertFalse(os.path.exists(self.old))
+        self.assertReloads(loaded)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from core import prize_snapshot
+from core.persistence import writer
+from core.prize_manager import PrizeManager
+from core.prize_snapshot import PrizeTable
+
+N = 300
+
+
+class PrizeSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        # 用小一些的阈值，不必生成上万种奖品
+        patcher = mock.patch.object(prize_snapshot, "MIN_PRIZES", 100)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.addCleanup(writer.flush)  # 删除目录前等写线程写完
+        self.path = os.path.join(self.dir, "prizes.json")
+        self.data = {"prizes": {f"奖品{i}": {"count": i % 7} for i in range(N)},
+                     "recent": ["奖品1", "奖品2", "奖品2"], "persistence": "json"}
+        self.data["prizes"]["奖品5"]["note"] = "x"
+        self.write(self.data)
+
+    def write(self, data):
+        with open(self.path, "w", encoding="utf8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+
+    def load(self):
+        writer.flush()
+        return PrizeManager(self.path)
+
+    def assertSameState(self, pm, expected):
+        self.assertEqual(pm.prizes.to_dict(), expected.prizes)
+        self.assertEqual(list(pm.recent), list(expected.recent))
+        for name, w in expected.weights.items():
+            self.assertAlmostEqual(pm.weights[name], w, places=12, msg=name)
+        for i in range(50):
+            u = i / 50 * expected._tree.total()
+            self.assertEqual(pm._sample(u), expected._sample(u))
+
+    def test_snapshot_matches_json_source(self):
+        first = self.load()
+        self.assertIsInstance(first.prizes, PrizeTable)
+        writer.flush()
+        self.assertEqual(prize_snapshot.generations(self.path), [1])
+
+        gen, loaded = prize_snapshot.load_latest(self.path)
+        self.assertEqual(gen, 1)
+        self.assertIsNotNone(loaded[3])  # 带着权重树，载入时不重新计算
+        snap = self.load()
+        self.assertEqual(snap._snapshot_gen, 1)
+        source = PrizeManager(config_path=None, data=json.loads(json.dumps(self.data)))
+        self.assertSameState(snap, source)
+
+    def test_stale_snapshot_is_ignored(self):
+        self.load()
+        writer.flush()
+        self.data["prizes"]["奖品3"]["count"] = 100
+        self.write(self.data)
+        st = os.stat(self.path)
+        os.utime(self.path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+        pm = self.load()
+        self.assertEqual(pm.prizes["奖品3"]["count"], 100)
+        writer.flush()
+        self.assertEqual(prize_snapshot.generations(self.path), [2])  # 按新内容重建
+
+        again = self.load()
+        self.assertEqual(again._snapshot_gen, 2)
+        self.assertEqual(again.prizes["奖品3"]["count"], 100)
+
+    def test_table_stays_in_journal_mode(self):
+        pm = self.load()
+        self.assertEqual(pm.persistence, "journal")
+
+        # 修改数量：仍是紧凑表
+        old = json.loads(json.dumps(self.data))
+        self.data["prizes"]["奖品6"]["count"] = 50
+        pm.apply_changes(old, self.data)
+        self.assertIsInstance(pm.prizes, PrizeTable)
+        self.assertEqual(pm.persistence, "journal")
+
+        # 增加奖品并修改设置：换回 dict，种类仍然很多，还是日志模式
+        old = json.loads(json.dumps(self.data))
+        self.data["prizes"]["新奖品"] = {"count": 3}
+        self.data["recent_size"] = 4
+        pm.apply_changes(old, self.data)
+        self.assertNotIsInstance(pm.prizes, PrizeTable)
+        self.assertEqual(pm.persistence, "journal")
+
+        pm.compact_every = 10
+        for _ in range(25):  # 期间压缩两次
+            pm.draw_prize()
+        self.assertEqual(pm.persistence, "journal")
+        writer.flush()
+        self.assertEqual(pm._journal_size, 5)
+        with open(pm.journal_path, encoding="utf8") as f:
+            self.assertEqual(len(f.read().splitlines()), 5)
+
+        loaded = self.load()
+        self.assertEqual(loaded.persistence, "journal")
+        data, expected = loaded.snapshot_data(), pm.snapshot_data()
+        self.assertEqual(data.pop("prizes").to_dict(), expected.pop("prizes"))
+        self.assertEqual(data, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
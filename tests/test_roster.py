@@ -0,0 +1,85 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from core.roster import Roster
+
+
+class RosterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+        self.path = os.path.join(self.dir, "roster")
+        self.csv = os.path.join(self.dir, "people.csv")
+        rows = ["id,name,weight", "E000,,0"]  # 权重为 0 的人不参与
+        rows += [f"E{i:03d},员工{i},{1 + i % 3}" for i in range(1, 60)]
+        rows += ["E900,缺省权重,", ",没有工号,5"]
+        with open(self.csv, "w", encoding="utf8", newline="") as f:
+            f.write("\n".join(rows) + "\n")
+
+    def test_import_round_trip(self):
+        roster = Roster.import_csv(self.csv, self.path)
+        for r in (roster, Roster(self.path)):
+            self.assertEqual(r.size(), 61)
+            self.assertEqual(r.remaining(), 60)
+            self.assertEqual(r.person(0), ("E000", ""))
+            self.assertEqual(r.label(0), "E000")
+            self.assertEqual(r.label(1), "员工1（E001）")
+            self.assertEqual(r.person(60), ("E900", "缺省权重"))
+            self.assertEqual(r.winners(), [])
+
+    def test_missing_id_column(self):
+        with open(self.csv, "w", encoding="utf8") as f:
+            f.write("name\n张三\n")
+        self.assertRaises(ValueError, Roster.import_csv, self.csv, self.path)
+
+    def test_removed_never_drawn_after_restart(self):
+        roster = Roster.import_csv(self.csv, self.path)
+        first = [roster.draw() for _ in range(5)] + roster.draw_many(15)
+
+        reopened = Roster(self.path)
+        self.assertEqual(reopened.winners(), first)
+        self.assertEqual(reopened.remaining(), 40)
+        rest = reopened.draw_many(40)
+        self.assertFalse(set(rest) & set(first))
+        self.assertEqual(sorted(first + rest), list(range(1, 61)))  # 权重为 0 的人没有抽中
+
+        self.assertRaises(ValueError, reopened.draw)
+        self.assertEqual(Roster(self.path).winners(), first + rest)
+
+    def test_short_roster_leaves_state_unchanged(self):
+        roster = Roster.import_csv(self.csv, self.path)
+        roster.draw_many(55)
+        self.assertRaises(ValueError, roster.draw_many, 10)
+        self.assertEqual(roster.remaining(), 5)
+        self.assertEqual(len(roster.draw_many(5)), 5)
+        self.assertEqual(len(Roster(self.path).winners()), 60)
+
+    def test_torn_removed_tail_is_truncated(self):
+        roster = Roster.import_csv(self.csv, self.path)
+        first = roster.draw_many(10)
+        removed_path = os.path.join(self.path, "removed.I")
+        with open(removed_path, "ab") as f:
+            f.write(b"\x07\x00")  # 写到一半崩溃
+
+        reopened = Roster(self.path)
+        self.assertEqual(reopened.winners(), first)
+        self.assertEqual(os.path.getsize(removed_path), 10 * 4)
+
+        # 之后的追加从整条开始
+        more = reopened.draw_many(3)
+        self.assertFalse(set(more) & set(first))
+        self.assertEqual(Roster(self.path).winners(), first + more)
+
+    def test_reset(self):
+        roster = Roster.import_csv(self.csv, self.path)
+        roster.draw_many(30)
+        roster.reset()
+        self.assertEqual(roster.remaining(), 60)
+        self.assertEqual(Roster(self.path).winners(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+from collections import Counter
+
+from core.prize_manager import PrizeManager
+
+
+def make(prizes, recent, policies):
+    return PrizeManager(config_path=None, data={"prizes": prizes, "recent": recent, "policies": policies})
+
+
+class CapPolicyTest(unittest.TestCase):
+
+    def test_caps_only_some_prizes(self):
+        pm = make({"A": {"count": 100}, "B": {"count": 100}}, ["A", "A"],
+                  [{"type": "cap", "max": 2}])
+        self.assertEqual(set(pm._sample() for _ in range(200)), {"B"})
+
+    def test_all_capped_falls_back_instead_of_exhausting(self):
+        pm = make({"A": {"count": 100}, "B": {"count": 100}, "C": {"count": 0}}, ["A", "B", "A", "B"],
+                  [{"type": "default"}, {"type": "cap", "max": 2}])
+        self.assertEqual(pm._tree.total(), 0)
+        freq = Counter(pm._sample() for _ in range(2000))
+        self.assertEqual(set(freq), {"A", "B"})
+        self.assertEqual(len(pm.draw_many(10)), 10)
+
+    def test_exhausted_still_raises(self):
+        pm = make({"A": {"count": 2}}, ["A", "A"], [{"type": "cap", "max": 2}])
+        self.assertEqual(pm.draw_many(5), ["A", "A"])
+        self.assertRaises(ValueError, pm.draw_prize)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import random
+import unittest
+from collections import Counter, deque
+
+from core.prize_manager import PrizeManager
+from core.weight_tree import WeightTree
+
+
+def baseline_weights(prizes, recent):
+    """原来的 recalculate_weights：没出现 ×1.5，连续两次 ×0.3，归一化"""
+    freq = Counter(recent)
+    weights = {}
+    for name, p in prizes.items():
+        if p["count"] <= 0:
+            weights[name] = 0
+            continue
+        base = 1
+        if freq[name] == 0:
+            base *= 1.5
+        if len(recent) >= 2 and recent[-1] == name and recent[-2] == name:
+            base *= 0.3
+        weights[name] = base
+    total = sum(weights.values())
+    return {name: w / (total if total > 0 else 1) for name, w in weights.items()}
+
+
+def baseline_draw(prizes, recent, rng):
+    weights = baseline_weights(prizes, recent)
+    name = rng.choices(list(weights), weights=list(weights.values()))[0]
+    prizes[name]["count"] -= 1
+    recent.append(name)
+    return name
+
+
+class WeightTreeTest(unittest.TestCase):
+
+    def test_find_matches_linear_scan(self):
+        rng = random.Random(1)
+        for compact in (False, True):
+            weights = [rng.choice([0, 0.3, 1, 1.5]) for _ in range(37)]
+            tree = WeightTree(weights, compact=compact)
+            for _ in range(500):
+                i = rng.randrange(len(weights))
+                weights[i] = rng.choice([0, 0.3, 1, 1.5])
+                tree.update(i, weights[i])
+                self.assertAlmostEqual(tree.total(), sum(weights))
+
+                u = rng.random() * sum(weights)
+                acc = 0
+                for expected, w in enumerate(weights):
+                    acc += w
+                    if acc > u:
+                        break
+                self.assertEqual(tree.find(u), expected)
+
+    def test_from_arrays_round_trip(self):
+        tree = WeightTree([1, 0, 1.5, 0.3], compact=True)
+        copy = WeightTree.from_arrays(*tree.arrays())
+        self.assertEqual(copy.total(), tree.total())
+        self.assertEqual([copy.find(u) for u in (0, 1, 2, 2.6)], [0, 2, 2, 3])
+
+
+class BaselineEquivalenceTest(unittest.TestCase):
+
+    def make(self, prizes, recent=()):
+        return PrizeManager(config_path=None, data={
+            "prizes": {name: dict(p) for name, p in prizes.items()},
+            "recent": list(recent)
+        })
+
+    def test_weights_follow_baseline_rules(self):
+        rng = random.Random(7)
+        prizes = {f"P{i}": {"count": rng.randint(0, 6)} for i in range(25)}
+        recent = deque(maxlen=5)
+        pm = self.make(prizes)
+
+        while any(p["count"] > 0 for p in prizes.values()):
+            expected = baseline_weights(prizes, recent)
+            weights = pm.weights
+            self.assertEqual(set(weights), set(expected))
+            for name, w in expected.items():
+                self.assertAlmostEqual(weights[name], w, places=9, msg=name)
+
+            # 两边走同一个结果，之后的状态必须一致
+            name = baseline_draw(prizes, recent, rng)
+            pm._apply_draw(name)
+            self.assertEqual(pm.prizes[name]["count"], prizes[name]["count"])
+            self.assertEqual(list(pm.recent), list(recent))
+
+        self.assertEqual(pm._tree.total(), 0)
+        self.assertRaises(ValueError, pm.draw_prize)
+
+    def test_sampling_frequencies(self):
+        prizes = {"A": {"count": 10 ** 6}, "B": {"count": 10 ** 6},
+                  "C": {"count": 10 ** 6}, "D": {"count": 0}}
+        recent = ["C", "B", "A", "A"]
+        expected = baseline_weights(prizes, recent)
+        pm = self.make(prizes, recent)
+
+        n = 200000
+        rng = random.Random(2024)
+        freq = Counter(pm._sample(rng.random()) for _ in range(n))
+        for name, p in expected.items():
+            self.assertAlmostEqual(freq[name] / n, p, delta=0.005, msg=name)
+        self.assertEqual(freq["D"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,29 +1,48 @@
 # ui/draw_window.py
-import os
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel, QHBoxLayout
-from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
-from PySide6.QtMultimediaWidgets import QVideoWidget
-from PySide6.QtCore import QUrl, QTimer, Qt, Signal
+import time
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QLabel, QHBoxLayout,
+                               QStackedWidget)
+from PySide6.QtMultimedia import QMediaPlayer
+from PySide6.QtCore import Qt, Signal
+from .media_pool import MediaPool
+from .slot_reel_widget import SlotReelWidget, MAX_NAMES
+from core.animation_manager import is_reel, REEL_PREFIX
+from core.metrics import metrics
 
 class DrawWindow(QWidget):
     finished = Signal(str)  # emits prize name when done
+    _resultReady = Signal(int, object)  # (draw id, prize) from engine thread
 
     def __init__(self, draw_engine, parent=None):
         super().__init__(parent)
         self.engine = draw_engine
         self.setup_ui()
-        self._anim_playing = False
         self._anim_file = None
 
-        # poll for calculation done
-        self.timer = QTimer()
-        self.timer.setInterval(200)
-        self.timer.timeout.connect(self._poll)
+        self._draw_id = 0
+        self._drawing = False
+        self._result = None
+        self._has_result = False
+        self._play_started = None  # waiting for the first position update
+        self._skip_started = None
+        self._reel_mode = False    # current draw uses the slot machine
+        self._reel_names = []
+
+        # queued across threads: slot runs on the GUI thread
+        self._resultReady.connect(self._on_result_ready)
 
     def setup_ui(self):
         self.layout = QVBoxLayout(self)
-        self.videoWidget = QVideoWidget()
-        self.layout.addWidget(self.videoWidget)
+        # one video widget per preloaded clip, switched at draw time
+        self.videoStack = QStackedWidget()
+        self.videoStack.addWidget(QWidget())  # blank page when nothing plays
+        self.layout.addWidget(self.videoStack)
+
+        # procedural slot machine, shares the stack with the video pages
+        self.reel = SlotReelWidget()
+        self.videoStack.addWidget(self.reel)
+        self.reel.halfway.connect(lambda: self.engine.resolve())
+        self.reel.landed.connect(self._on_reel_landed)
 
         # controls
         h = QHBoxLayout()
@@ -34,78 +53,132 @@ class DrawWindow(QWidget):
         h.addWidget(self.skipBtn)
         self.layout.addLayout(h)
 
-        # media player
-        self.player = QMediaPlayer(self)
-        self.audio = QAudioOutput(self)
-        self.player.setAudioOutput(self.audio)
-        self.player.setVideoOutput(self.videoWidget)
-
-        self.player.playbackStateChanged.connect(self._on_playback_state_changed)
-        self.player.mediaStatusChanged.connect(self._on_media_status_changed)
+        # warm media players
+        # budgeted by decoded-frame memory, sized from the media index
+        self.pool = MediaPool(self.videoStack, size_of=self._video_size, parent=self)
+        self.pool.playbackStateChanged.connect(self._on_playback_state_changed)
+        self.pool.positionChanged.connect(self._on_position_changed)
 
         self.skipBtn.clicked.connect(self._on_skip)
 
-    def start_draw(self):
-        # get selected animation
-        item = self.engine.am.get_weighted_animation()
-        if item is None:
-            # no animation configured
-            self._anim_file = None
-            # start compute immediately
-            self.engine.start_draw(lambda f: None, lambda: None)
-            self.timer.start()
-            return
+    def _video_size(self, path):
+        entry = self.engine.am.index.get(path)
+        if entry and entry.get("width") and entry.get("height"):
+            return entry["width"], entry["height"]
+        return None
 
-        anim_type, anim_file = item
-        self._anim_file = anim_file
+    def preload(self):
+        """load players for every enabled clip (startup / after settings save)"""
+        self.pool.preload(self.engine.am.enabled_files())
+        # a bounded sample for the reel strip; the winner is painted in on landing
+        try:
+            self._reel_names = self.engine.pm.sample_names(MAX_NAMES)
+        except (OSError, RuntimeError):
+            self._reel_names = []  # draw server unreachable: reels show "?" rows
 
-        # play animation
-        if os.path.exists(anim_file):
-            url = QUrl.fromLocalFile(anim_file)
-            self.player.setSource(url)
-            self.player.play()
+    def start_draw(self):
+        self._draw_id += 1
+        draw_id = self._draw_id
+        self._drawing = True
+        self._result = None
+        self._has_result = False
+        self._skip_started = None
+        self.skipBtn.setEnabled(True)
+
+        # engine picks the animation and calls back once the result exists
+        self.engine.start_draw(self._play,
+                               lambda prize: self._resultReady.emit(draw_id, prize))
+
+    def _play(self, anim_file):
+        self._anim_file = anim_file
+        self._reel_mode = is_reel(anim_file)
+        if self._reel_mode:
+            # no video decode at all: spin until the engine has the result
+            self.pool.stop()
+            self.videoStack.setCurrentWidget(self.reel)
+            options = self.engine.am.reel_options(anim_file[len(REEL_PREFIX):])
+            self.reel.start(self._reel_names, options["duration"], options["reels"])
+        # existence comes from the media index — no filesystem access here
+        elif anim_file and self.engine.am.index.exists(anim_file):
+            self._play_started = time.perf_counter()
+            player = self.pool.acquire(anim_file)
+            player.setPosition(0)
+            player.play()
         else:
-            # file missing — fallback to no animation
-            self.player.stop()
-
-        # start computing in engine thread (engine will compute in background)
-        self.engine.start_draw(lambda f: None, lambda: None)
-        self.timer.start()
+            # no animation / file missing — compute immediately
+            self.pool.stop()
+            self.videoStack.setCurrentIndex(0)
+            self.engine.resolve()
+
+    def _on_position_changed(self, position):
+        if self._play_started is not None and position > 0:
+            # playback is actually moving: the first frame is on screen
+            metrics.observe("ui.first_frame", time.perf_counter() - self._play_started)
+            self._play_started = None
+
+        # compute at the real halfway point of the clip
+        duration = self.pool.duration()
+        if self._drawing and duration > 0 and position >= duration / 2:
+            self.engine.resolve()
 
     def _on_playback_state_changed(self, state):
-        # if stopped and calculation done -> show result
-        if state == QMediaPlayer.PlaybackState.Stopped:
-            # if calculated, emit result
-            if self.engine.calculated:
+        if self._reel_mode:
+            return
+        if state == QMediaPlayer.PlaybackState.Stopped and self._drawing:
+            # ended (or failed) before halfway: compute now
+            self.engine.resolve()
+            if self._has_result:
                 self.finish_with_result()
-            else:
-                # if video ended but calc not done, wait (timer already running)
-                pass
-
-    def _on_media_status_changed(self, status):
-        # when media loaded, we want to not enable skip until calculation is done
-        pass
-
-    def _poll(self):
-        # enable skip when calculation finished
-        if self.engine.calculated:
-            self.skipBtn.setEnabled(True)
-        # if calculation finished and media is not playing, finish
-        if self.engine.calculated and self.player.playbackState() != QMediaPlayer.PlaybackState.Playing:
+
+    def _on_result_ready(self, draw_id, prize):
+        if draw_id != self._draw_id or not self._drawing:
+            return  # stale result from an abandoned draw
+        self._result = prize
+        self._has_result = True
+        if self._reel_mode:
+            self._land_reel()
+            return
+        # video still running → wait for it to end or be skipped
+        if not self.pool.is_playing():
             self.finish_with_result()
 
     def _on_skip(self):
-        # user chooses to skip — stop video and finish
-        try:
-            self.player.stop()
-        except:
-            pass
-        self.finish_with_result()
+        # user chooses to skip — stop video; result shows as soon as it exists
+        metrics.count("ui.skips")
+        self._skip_started = time.perf_counter()
+        self._play_started = None
+        self.engine.resolve()
+        if self._reel_mode:
+            if self._has_result:
+                self._land_reel()
+            return
+        self.pool.stop()
+        if self._has_result:
+            self.finish_with_result()
 
-    def finish_with_result(self):
-        self.timer.stop()
-        prize = self.engine.result
+    def _land_reel(self):
+        prize = self._result
         if prize is None:
-            # if engine hasn't set result for some reason, compute synchronously
-            prize = self.engine.pm.draw_prize()
-        self.finished.emit(prize)
+            self.reel.stop()
+            return
+        # roster results read "prize：winner"; the reels only carry prize names
+        name = prize.split("：", 1)[0]
+        if self._skip_started is not None:
+            self.reel.show_now(name)
+        else:
+            self.reel.land(name)
+
+    def _on_reel_landed(self):
+        if self._drawing and self._has_result:
+            self.finish_with_result()
+
+    def finish_with_result(self):
+        if not self._drawing:
+            return
+        self._drawing = False
+        self.skipBtn.setEnabled(False)
+        if self._skip_started is not None:
+            metrics.observe("ui.skip_to_result", time.perf_counter() - self._skip_started)
+            self._skip_started = None
+        prize = self._result
+        self.finished.emit(prize if prize is not None else "奖品已全部抽完")
@@ -3,49 +3,111 @@ import sys
 import os
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QApplication,
                                QPushButton, QLabel, QFrame)
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer, Signal
+from PySide6.QtGui import QShortcut, QKeySequence
 from .title_bar import TitleBar
-from .settings_window import SettingsWindow
-from .draw_window import DrawWindow
 from .result_window import ResultWindow
 from core.config_manager import ConfigManager
 from core.prize_manager import PrizeManager
 from core.animation_manager import AnimationManager
 from core.draw_engine import DrawEngine
+from core.config_watcher import ConfigReloader
+from core.history_store import HistoryStore
+from core.startup_profiler import profiler
+from core.metrics import metrics
+from core.persistence import writer, SHUTDOWN_TIMEOUT
 
 class MainWindow(QWidget):
-    def __init__(self):
+    _runOnGui = Signal(object)  # callables queued from the config watcher thread
+
+    def __init__(self, server=None):
+        """server: address of a shared draw server ("host:port" / "unix:/path");
+        None keeps the inventory in this process"""
         super().__init__()
         self.setWindowFlags(Qt.FramelessWindowHint)
         self.setMinimumSize(900, 600)
         self.setObjectName("mainWindow")
 
         # ensure config exists
-        ConfigManager.ensure_default()
-
-        # core managers
-        self.pm = PrizeManager()
-        self.am = AnimationManager()
-        self.engine = DrawEngine(self.pm, self.am)
-
-        self.title = TitleBar("抽奖程序")
-        self.title.minimizeRequested.connect(self.showMinimized)
-        self.title.maximizeRequested.connect(self.toggle_max)
-        self.title.closeRequested.connect(self.close)
-
-        self.title.setFixedHeight(36)
-
-        self.settingsWindow = SettingsWindow(self.am)
-        self.settingsWindow.settingsChanged.connect(self._on_settings_changed)
-
-        self.drawWindow = DrawWindow(self.engine)
-        self.drawWindow.finished.connect(self._on_draw_finished)
-
-        self.resultWindow = ResultWindow()
-        self.resultWindow.retryRequested.connect(self._on_retry)
-        self.resultWindow.backRequested.connect(self._on_back)
-
-        self.init_ui()
+        with profiler.phase("config"):
+            ConfigManager.ensure_default()
+
+            # core managers
+            if server:
+                from core.draw_server import DrawClient
+                self.pm = DrawClient(server)
+            else:
+                self.pm = PrizeManager()
+            self.am = AnimationManager()
+            self.history = HistoryStore("config/history")
+            self.engine = DrawEngine(self.pm, self.am, prefetch=self.pm.prefetch,
+                                     history=self.history)
+
+            # pick up edits made to config/ while the app is running
+            self._runOnGui.connect(lambda fn: fn())
+            self.reloader = ConfigReloader(self.engine, dispatch=self._runOnGui.emit,
+                                           on_animations=self._on_animations_changed)
+            self.reloader.start()
+
+        # settings / draw (QtMultimedia) / result windows are built on first
+        # use; the draw window is warmed up right after the first frame
+        self._settingsWindow = None
+        self._drawWindow = None
+        self._resultWindow = None
+        self._first_paint = True
+
+        with profiler.phase("widgets"):
+            self.title = TitleBar("抽奖程序")
+            self.title.minimizeRequested.connect(self.showMinimized)
+            self.title.maximizeRequested.connect(self.toggle_max)
+            self.title.closeRequested.connect(self.close)
+
+            self.title.setFixedHeight(36)
+
+            self.init_ui()
+
+        # metrics overlay (F12) only exists when instrumentation is on
+        self.metricsOverlay = None
+        if metrics.enabled:
+            from .metrics_overlay import MetricsOverlay
+            self.metricsOverlay = MetricsOverlay(self)
+            QShortcut(QKeySequence("F12"), self, activated=self.metricsOverlay.toggle)
+            if os.environ.get("LOTTERY_METRICS_OVERLAY") == "1":
+                self.metricsOverlay.show()
+
+        self.load_style()
+
+    @property
+    def settingsWindow(self):
+        if self._settingsWindow is None:
+            with profiler.phase("settings_window"):
+                from .settings_window import SettingsWindow
+                self._settingsWindow = SettingsWindow(self.am)
+                self._settingsWindow.settingsChanged.connect(self._on_settings_changed)
+        return self._settingsWindow
+
+    @property
+    def drawWindow(self):
+        if self._drawWindow is None:
+            with profiler.phase("draw_window"):
+                # importing draw_window pulls in QtMultimedia
+                from .draw_window import DrawWindow
+                self._drawWindow = DrawWindow(self.engine)
+                self._drawWindow.finished.connect(self._on_draw_finished)
+                self.centerFrameLayout.insertWidget(0, self._drawWindow)
+            with profiler.phase("media_preload"):
+                self._drawWindow.preload()
+        return self._drawWindow
+
+    @property
+    def resultWindow(self):
+        if self._resultWindow is None:
+            self._resultWindow = ResultWindow()
+            self._resultWindow.retryRequested.connect(self._on_retry)
+            self._resultWindow.backRequested.connect(self._on_back)
+            self._resultWindow.hide()
+            self.centerFrameLayout.addWidget(self._resultWindow)
+        return self._resultWindow
 
     def init_ui(self):
         self.layout = QVBoxLayout(self)
@@ -71,30 +133,51 @@ class MainWindow(QWidget):
         left.addWidget(left_frame)
         content.addLayout(left, 1)
 
-        # center area: drawWindow placeholder or result
+        # center area: drawWindow / resultWindow are inserted on first use
         self.centerFrame = QFrame()
         self.centerFrameLayout = QVBoxLayout(self.centerFrame)
-        self.centerFrameLayout.addWidget(self.drawWindow)
-        self.centerFrameLayout.addWidget(self.resultWindow)
-        self.resultWindow.hide()
 
         content.addWidget(self.centerFrame, 3)
         self.layout.addLayout(content)
 
-        # load style
-        qss_path = os.path.join(os.path.dirname(__file__), "style.qss")
-        try:
-            with open(qss_path, "r", encoding="utf8") as f:
-                self.setStyleSheet(f.read())
-        except Exception:
-            pass
+    def load_style(self):
+        with profiler.phase("stylesheet"):
+            qss_path = os.path.join(os.path.dirname(__file__), "style.qss")
+            try:
+                with open(qss_path, "r", encoding="utf8") as f:
+                    self.setStyleSheet(f.read())
+            except Exception:
+                pass
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._first_paint:
+            self._first_paint = False
+            profiler.mark("first_frame")
+            # idle time after the first frame: build the multimedia stack
+            QTimer.singleShot(0, self._warm_up)
+
+    def _warm_up(self):
+        self.drawWindow
+        profiler.mark("warm_up_done")
+        profiler.report()
 
     def _open_settings(self):
         self.settingsWindow.show()
 
     def _on_settings_changed(self):
-        # reload animation manager config if needed
-        self.am.load()
+        # the settings window edits self.am in place and saves it:
+        # nothing to re-read, only the preloaded players may change
+        if self._drawWindow is not None:
+            self._drawWindow.preload()
+
+    def _on_animations_changed(self, files_changed):
+        # animation_slots.json was edited outside the app: the slot list always
+        # follows it, players are reloaded only when the enabled clips changed
+        if files_changed and self._drawWindow is not None:
+            self._drawWindow.preload()
+        if self._settingsWindow is not None:
+            self._settingsWindow.refresh_ui()
 
     def _start_draw(self):
         # hide result, show draw area
@@ -104,22 +187,29 @@ class MainWindow(QWidget):
 
     def _on_draw_finished(self, prize):
         # hide draw window and show result
-        self.drawWindow.hide()
+        self._drawWindow.hide()
         self.resultWindow.set_result(prize)
         self.resultWindow.show()
 
     def _on_retry(self):
         self.resultWindow.hide()
         self.drawWindow.show()
-        # ensure engine resets flags
-        self.engine.calculated = False
-        self.engine.result = None
         self.drawWindow.start_draw()
 
     def _on_back(self):
-        self.resultWindow.hide()
+        self._resultWindow.hide()
         self.settingsWindow.show()
 
+    def closeEvent(self, event):
+        # stop the watcher and engine worker so they never outlive the window
+        self.reloader.stop()
+        self.engine.close()
+        self.history.close()
+        # pending prize / slot saves must reach the disk, but a stuck disk must not block closing
+        if not writer.flush(SHUTDOWN_TIMEOUT):
+            print("saves still pending at shutdown", file=sys.stderr)
+        super().closeEvent(event)
+
     def toggle_max(self):
         if self.isMaximized():
             self.showNormal()
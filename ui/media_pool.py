@@ -0,0 +1,147 @@
+# ui/media_pool.py
+import os
+import time
+from collections import OrderedDict
+from PySide6.QtCore import QObject, QUrl, Signal
+from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
+from PySide6.QtMultimediaWidgets import QVideoWidget
+from core.metrics import metrics
+
+PREROLL_FRAMES = 8            # decoded frames a loaded player may hold (decoder + sink queue)
+DEFAULT_SIZE = (1920, 1080)   # assumed resolution when the media index has none
+PLAYER_OVERHEAD = 8 << 20     # decoder / pipeline state per player, bytes
+
+
+def estimate_bytes(size):
+    """approximate memory held by one loaded player: preroll frames of RGBA at size"""
+    width, height = size or DEFAULT_SIZE
+    return width * height * 4 * PREROLL_FRAMES + PLAYER_OVERHEAD
+
+
+class MediaPool(QObject):
+    """
+    Keeps one loaded QMediaPlayer + QVideoWidget per animation file so a draw
+    only switches the visible page and calls play() — no setSource per draw.
+
+    The pool is bounded by memory: each player is charged estimate_bytes() of
+    its resolution (size_of(path) -> (width, height) or None, e.g. from the
+    media index), and least recently used players are evicted while the total
+    exceeds budget_bytes. max_players is a second, hard cap on the count.
+    """
+    playbackStateChanged = Signal(object)  # forwarded from the current player
+    positionChanged = Signal(int)
+
+    def __init__(self, stack, budget_bytes=320 << 20, max_players=8, size_of=None, parent=None):
+        super().__init__(parent)
+        self.stack = stack  # QStackedWidget holding the video widgets
+        self.budget_bytes = budget_bytes
+        self.max_players = max_players
+        self.size_of = size_of or (lambda path: None)
+        self._entries = OrderedDict()  # path -> (player, audio, widget)
+        self._cost = {}                # path -> estimated bytes
+        self.current = None
+
+    def used_bytes(self):
+        return sum(self._cost.values())
+
+    def _estimate(self, path):
+        return estimate_bytes(self.size_of(path))
+
+    def preload(self, files):
+        """load the given files (most important first) while they fit the budget; drop everything else"""
+        chosen = []
+        total = 0
+        for f in files:
+            if len(chosen) >= self.max_players or not os.path.exists(f):
+                continue
+            cost = self._estimate(f)
+            if chosen and total + cost > self.budget_bytes:
+                continue
+            chosen.append(f)
+            total += cost
+        files = chosen
+        for path in list(self._entries):
+            if path not in files:
+                self._evict(path)
+        for path in reversed(files):
+            self._get(path)
+
+    def acquire(self, path):
+        """show the player for path and make it current (loads it if needed)"""
+        player, _, widget = self._get(path)
+        self.stack.setCurrentWidget(widget)
+        # switch first so the old player's Stopped is not forwarded
+        previous, self.current = self.current, player
+        if previous is not None and previous is not player:
+            previous.stop()
+        return player
+
+    def stop(self):
+        if self.current is not None:
+            self.current.stop()
+
+    def is_playing(self):
+        return (self.current is not None and
+                self.current.playbackState() == QMediaPlayer.PlaybackState.Playing)
+
+    def duration(self):
+        return self.current.duration() if self.current is not None else 0
+
+    def _get(self, path):
+        if path in self._entries:
+            self._entries.move_to_end(path)
+            return self._entries[path]
+
+        widget = QVideoWidget()
+        player = QMediaPlayer(self)
+        audio = QAudioOutput(self)
+        player.setAudioOutput(audio)
+        player.setVideoOutput(widget)
+        started = time.perf_counter()
+        player.setSource(QUrl.fromLocalFile(path))
+
+        player.mediaStatusChanged.connect(
+            lambda status, t=started: self._on_media_status(status, t))
+        player.playbackStateChanged.connect(
+            lambda state, p=player: self._forward_state(p, state))
+        player.positionChanged.connect(
+            lambda pos, p=player: self._forward_position(p, pos))
+
+        self.stack.addWidget(widget)
+        self._entries[path] = (player, audio, widget)
+        self._cost[path] = self._estimate(path)
+
+        # LRU eviction, never the new one or the one on screen
+        while len(self._entries) > self.max_players or self.used_bytes() > self.budget_bytes:
+            victim = next((p for p, entry in self._entries.items()
+                           if p != path and entry[0] is not self.current), None)
+            if victim is None:
+                break
+            self._evict(victim)
+        return self._entries[path]
+
+    def _evict(self, path):
+        player, audio, widget = self._entries.pop(path)
+        del self._cost[path]
+        if player is self.current:
+            self.current = None
+        player.stop()
+        player.setSource(QUrl())
+        self.stack.removeWidget(widget)
+        widget.deleteLater()
+        audio.deleteLater()
+        player.deleteLater()
+
+    def _on_media_status(self, status, started):
+        if status == QMediaPlayer.MediaStatus.LoadedMedia:
+            metrics.observe("ui.media_load", time.perf_counter() - started)
+        elif status == QMediaPlayer.MediaStatus.InvalidMedia:
+            metrics.count("ui.media_invalid")
+
+    def _forward_state(self, player, state):
+        if player is self.current:
+            self.playbackStateChanged.emit(state)
+
+    def _forward_position(self, player, position):
+        if player is self.current:
+            self.positionChanged.emit(position)
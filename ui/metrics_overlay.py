@@ -0,0 +1,51 @@
+# ui/metrics_overlay.py
+from PySide6.QtWidgets import QLabel
+from PySide6.QtCore import Qt, QTimer
+from core.metrics import metrics
+
+class MetricsOverlay(QLabel):
+    """
+    Debug overlay in the top-right corner of its parent: rolling p50/p95/max
+    per span plus counters, refreshed once a second while visible.
+    """
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.setObjectName("metricsOverlay")
+        self.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.setTextFormat(Qt.PlainText)
+        self.setStyleSheet("background: rgba(0,0,0,0.7); color: #9f9; "
+                           "font-family: Consolas, monospace; font-size: 11px; padding: 6px;")
+        self.timer = QTimer(self)
+        self.timer.setInterval(1000)
+        self.timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def toggle(self):
+        self.setVisible(not self.isVisible())
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        snap = metrics.snapshot()
+        lines = [f"{'span':<26}{'n':>6}{'p50':>9}{'p95':>9}{'max':>9}"]
+        for name, s in snap["spans"].items():
+            lines.append(f"{name:<26}{s['recent_count']:>6}"
+                         f"{_ms(s['p50']):>9}{_ms(s['p95']):>9}{_ms(s['max']):>9}")
+        for name, value in snap["counters"].items():
+            lines.append(f"{name:<26}{value:>6}")
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self.move(self.parentWidget().width() - self.width() - 10, 46)
+        self.raise_()
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f}ms"
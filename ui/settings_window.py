@@ -1,7 +1,10 @@
 # ui/settings_window.py
-from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QListWidget,
-                               QPushButton, QFileDialog, QHBoxLayout, QListWidgetItem)
-from PySide6.QtCore import Signal
+import os
+from PySide6.QtWidgets import (QWidget, QVBoxLayout, QLabel, QListView,
+                               QPushButton, QFileDialog, QHBoxLayout)
+from PySide6.QtCore import Signal, QSize
+from .slot_model import SlotListModel
+from core.thumbnail_cache import ThumbnailCache
 
 class SettingsWindow(QWidget):
     settingsChanged = Signal()  # emitted when enabled list or slots changed
@@ -10,8 +13,12 @@ class SettingsWindow(QWidget):
         super().__init__(parent)
         self.setWindowTitle("设置 - 自定义动画")
         self.am = animation_manager
+        # poster frames are extracted in the background and cached next to the config
+        self.thumbnails = ThumbnailCache(
+            os.path.join(os.path.dirname(self.am.config_path), "thumbnails"))
+        self.model = SlotListModel(self.am, self.thumbnails, self)
+        self._shown_once = False
         self.setup_ui()
-        self.refresh_ui()
 
     def setup_ui(self):
         self.layout = QVBoxLayout(self)
@@ -19,54 +26,65 @@ class SettingsWindow(QWidget):
 
         title = QLabel("自定义动画设置")
         title.setObjectName("title")
-        hint = QLabel("slot1/slot2 为抽奖组(rare+normal)。slot3~slot5 为普通单视频。")
+        hint = QLabel("group 为抽奖组(rare+normal)，single 为普通单视频。勾选即启用。")
         hint.setObjectName("hint")
         self.layout.addWidget(title)
         self.layout.addWidget(hint)
 
-        # list of slots
-        self.slotList = QListWidget()
+        # list of slots; uniform rows keep thousands of entries cheap to lay out
+        self.slotList = QListView()
+        self.slotList.setModel(self.model)
+        self.slotList.setUniformItemSizes(True)
+        self.slotList.setIconSize(QSize(self.thumbnails.width, self.thumbnails.width * 9 // 16))
         self.layout.addWidget(self.slotList)
 
         btnLayout = QHBoxLayout()
         self.btnAdd = QPushButton("添加/替换 槽位文件")
         self.btnToggle = QPushButton("启用/禁用 选中项")
+        self.btnNewGroup = QPushButton("新增抽奖组")
+        self.btnNewSingle = QPushButton("新增单视频")
+        self.btnNewReel = QPushButton("新增老虎机")
+        self.btnRemove = QPushButton("删除槽位")
         self.btnSave = QPushButton("保存")
-        btnLayout.addWidget(self.btnAdd)
-        btnLayout.addWidget(self.btnToggle)
-        btnLayout.addWidget(self.btnSave)
+        for btn in (self.btnAdd, self.btnToggle, self.btnNewGroup,
+                    self.btnNewSingle, self.btnNewReel, self.btnRemove, self.btnSave):
+            btnLayout.addWidget(btn)
         self.layout.addLayout(btnLayout)
 
         self.btnAdd.clicked.connect(self.add_replace)
         self.btnToggle.clicked.connect(self.toggle_enabled)
+        self.btnNewGroup.clicked.connect(lambda: self.add_slot("group"))
+        self.btnNewSingle.clicked.connect(lambda: self.add_slot("single"))
+        self.btnNewReel.clicked.connect(lambda: self.add_slot("reel"))
+        self.btnRemove.clicked.connect(self.remove_slot)
         self.btnSave.clicked.connect(self.save_and_emit)
 
+    def showEvent(self, event):
+        # clips may have been replaced on disk since the last time
+        if self._shown_once:
+            self.model.refresh_thumbnails()
+        self._shown_once = True
+        super().showEvent(event)
+
     def refresh_ui(self):
-        self.slotList.clear()
-        # Show all 5 slots: slot1..slot5 and the files currently set
-        for s in ["slot1", "slot2", "slot3", "slot4", "slot5"]:
-            desc = s
-            if s in self.am.rare and s in self.am.normal:
-                desc += f"  (group) rare={self.am.rare.get(s)} normal={self.am.normal.get(s)}"
-            elif s in self.am.single:
-                desc += f"  (single) file={self.am.single.get(s)}"
-            else:
-                desc += "  (empty)"
-            item = QListWidgetItem(desc)
-            if s in self.am.enabled:
-                item.setSelected(True)
-            self.slotList.addItem(item)
+        # only needed when the config was replaced behind our back
+        self.model.reload()
+
+    def _selected_row(self):
+        index = self.slotList.currentIndex()
+        return index.row() if index.isValid() else None
 
     def add_replace(self):
         # user picks a slot to replace
-        items = self.slotList.selectedItems()
-        if not items:
+        row = self._selected_row()
+        if row is None:
             return
-        idx = self.slotList.row(items[0])
-        slot = f"slot{idx+1}"
+        slot = self.model.slot_at(row)
+        if self.am.slots[slot] == "reel":
+            return  # rendered procedurally, no files to pick
 
-        # Depending on slot, pick file(s)
-        if slot in ("slot1", "slot2"):
+        # Depending on slot kind, pick file(s)
+        if self.am.slots[slot] == "group":
             # Need two files: rare and normal
             rare_path, _ = QFileDialog.getOpenFileName(self, "选择 稀有动画 (10%)", "", "视频文件 (*.mp4 *.avi *.mov)")
             if not rare_path:
@@ -74,27 +92,27 @@ class SettingsWindow(QWidget):
             normal_path, _ = QFileDialog.getOpenFileName(self, "选择 常规动画 (90%)", "", "视频文件 (*.mp4 *.avi *.mov)")
             if not normal_path:
                 return
-            self.am.rare[slot] = rare_path
-            self.am.normal[slot] = normal_path
+            self.model.set_group(row, rare_path, normal_path)
         else:
             file_path, _ = QFileDialog.getOpenFileName(self, "选择 动画文件", "", "视频文件 (*.mp4 *.avi *.mov)")
             if not file_path:
                 return
-            self.am.single[slot] = file_path
-
-        self.refresh_ui()
+            self.model.set_single(row, file_path)
 
     def toggle_enabled(self):
-        items = self.slotList.selectedItems()
-        if not items:
-            return
-        idx = self.slotList.row(items[0])
-        slot = f"slot{idx+1}"
-        if slot in self.am.enabled:
-            self.am.enabled.remove(slot)
-        else:
-            self.am.enabled.append(slot)
-        self.refresh_ui()
+        row = self._selected_row()
+        if row is not None:
+            self.model.toggle(row)
+
+    def add_slot(self, kind):
+        row = self.model.add_slot(kind)
+        self.slotList.setCurrentIndex(self.model.index(row))
+        self.slotList.scrollTo(self.model.index(row))
+
+    def remove_slot(self):
+        row = self._selected_row()
+        if row is not None:
+            self.model.remove_slot(row)
 
     def save_and_emit(self):
         self.am.save()
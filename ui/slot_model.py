@@ -0,0 +1,173 @@
+# ui/slot_model.py
+import os
+from collections import OrderedDict
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, Signal
+from PySide6.QtGui import QIcon
+
+class SlotListModel(QAbstractListModel):
+    """
+    One row per declared slot of an AnimationManager. Edits go through the
+    model so only the touched row is repainted; rows are never rebuilt except
+    when the whole config is replaced (reload()).
+
+    With a ThumbnailCache, DecorationRole shows a poster frame. The view only
+    asks for visible rows, so thumbnails are requested lazily while scrolling.
+    """
+    SlotRole = Qt.UserRole + 1   # slot id
+    KindRole = Qt.UserRole + 2   # "group" / "single"
+    FilesRole = Qt.UserRole + 3  # list of files used by the slot
+
+    _thumbReady = Signal(str)  # file, from a thumbnail worker thread
+
+    def __init__(self, animation_manager, thumbnails=None, parent=None, max_icons=512):
+        super().__init__(parent)
+        self.am = animation_manager
+        self.thumbnails = thumbnails
+        self.max_icons = max_icons
+        self._slots = list(self.am.slots)
+        self._icons = OrderedDict()  # file -> QIcon, LRU
+        self._thumbReady.connect(self._on_thumb_ready)
+
+    # ---------- read ----------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._slots)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._slots):
+            return None
+        slot = self._slots[index.row()]
+
+        if role == Qt.DisplayRole:
+            return self._describe(slot)
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if self.am.is_enabled(slot) else Qt.Unchecked
+        if role == Qt.DecorationRole:
+            return self._icon(slot)
+        if role == Qt.ToolTipRole:
+            return "\n".join(self.files(slot)) or None
+        if role == self.SlotRole:
+            return slot
+        if role == self.KindRole:
+            return self.am.slots[slot]
+        if role == self.FilesRole:
+            return self.files(slot)
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or not index.isValid():
+            return False
+        # views pass the check state as an int
+        self.am.set_enabled(self._slots[index.row()], Qt.CheckState(value) == Qt.Checked)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        return True
+
+    def files(self, slot):
+        if self.am.slots.get(slot) == "group":
+            return [f for f in (self.am.rare.get(slot), self.am.normal.get(slot)) if f]
+        f = self.am.single.get(slot)
+        return [f] if f else []
+
+    def _describe(self, slot):
+        kind = self.am.slots[slot]
+        if kind == "group":
+            if slot in self.am.rare and slot in self.am.normal:
+                return (f"{slot}  (group) rare={os.path.basename(self.am.rare[slot])} "
+                        f"normal={os.path.basename(self.am.normal[slot])}")
+        elif kind == "reel":
+            opts = self.am.reel_options(slot)
+            return f"{slot}  (reel) 老虎机 {opts['reels']} 轴 {opts['duration']:g}s"
+        elif slot in self.am.single:
+            return f"{slot}  (single) file={os.path.basename(self.am.single[slot])}"
+        return f"{slot}  ({kind}, empty)"
+
+    def _poster_file(self, slot):
+        # groups show the normal clip, the one people see most
+        if self.am.slots.get(slot) == "group":
+            return self.am.normal.get(slot) or self.am.rare.get(slot)
+        return self.am.single.get(slot)
+
+    def _icon(self, slot):
+        if self.thumbnails is None:
+            return None
+        file = self._poster_file(slot)
+        if not file:
+            return None
+        icon = self._icons.get(file)
+        if icon is not None:
+            self._icons.move_to_end(file)
+            return icon
+
+        if not self.thumbnails.known(file):
+            self.thumbnails.request(file, lambda f, _: self._thumbReady.emit(f))
+            return None
+        path = self.thumbnails.get(file)
+        if path is None:
+            return None  # no thumbnail possible (missing file / no ffmpeg)
+
+        icon = QIcon(path)
+        self._icons[file] = icon
+        while len(self._icons) > self.max_icons:
+            self._icons.popitem(last=False)
+        return icon
+
+    def _on_thumb_ready(self, file):
+        for row, slot in enumerate(self._slots):
+            if self._poster_file(slot) == file:
+                index = self.index(row)
+                self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def refresh_thumbnails(self):
+        """re-check files on disk (e.g. when the settings window is reopened)"""
+        if self.thumbnails is not None:
+            self.thumbnails.invalidate()
+            self._icons.clear()
+            if self._slots:
+                self.dataChanged.emit(self.index(0), self.index(len(self._slots) - 1),
+                                      [Qt.DecorationRole])
+
+    def slot_at(self, row):
+        return self._slots[row]
+
+    # ---------- edit ----------
+
+    def toggle(self, row):
+        slot = self._slots[row]
+        self.am.set_enabled(slot, not self.am.is_enabled(slot))
+        self._row_changed(row)
+
+    def set_group(self, row, rare_file, normal_file):
+        self.am.set_group(self._slots[row], rare_file, normal_file)
+        self._row_changed(row)
+
+    def set_single(self, row, file):
+        self.am.set_single(self._slots[row], file)
+        self._row_changed(row)
+
+    def add_slot(self, kind):
+        """append a new empty slot, returns its row"""
+        row = len(self._slots)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._slots.append(self.am.add_slot(kind))
+        self.endInsertRows()
+        return row
+
+    def remove_slot(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.am.remove_slot(self._slots.pop(row))
+        self.endRemoveRows()
+
+    def reload(self):
+        """the whole config was replaced (e.g. edited outside the app)"""
+        self.beginResetModel()
+        self._slots = list(self.am.slots)
+        self.endResetModel()
+
+    def _row_changed(self, row):
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
@@ -0,0 +1,273 @@
+# ui/slot_reel_widget.py
+import itertools
+import math
+import random
+from collections import OrderedDict
+from PySide6.QtWidgets import QWidget
+from PySide6.QtCore import Qt, QTimer, QElapsedTimer, QRectF, Signal
+from PySide6.QtGui import QPainter, QPixmap, QColor, QFont, QFontMetrics, QPen, QLinearGradient
+
+SPIN_SPEED = 14.0    # rows per second while spinning
+LAND_MIN = 0.25      # shortest ease onto the result, even when the result is late
+LAND_SPREAD = 0.4    # the first reel lands this fraction of the ease earlier than the last
+VISIBLE_ROWS = 3
+MAX_NAMES = 40       # rows on a strip; callers pass a sample, not the whole catalog
+
+_versions = itertools.count(1)
+
+
+class _Reel:
+    __slots__ = ("pos", "speed", "land", "target")
+
+    def __init__(self, pos, speed):
+        self.pos = pos      # row shown in the middle, fractional while moving
+        self.speed = speed
+        self.land = None    # (start time, start pos, distance, duration)
+        self.target = None  # absolute row that shows the winner instead of the strip
+
+
+class SlotReelWidget(QWidget):
+    """
+    Procedural slot machine: spinning reels of prize names, no video decode.
+
+    The reels cycle through a bounded sample of names (at most MAX_NAMES),
+    rendered once into a "strip" pixmap cached per name list version and size.
+    The winner does not have to be in the sample: on landing, each reel picks
+    a row a few positions ahead that is still off screen and paints the
+    winner there instead of the strip row, so the landing distance and time
+    depend on the configured duration, never on the catalog size.
+
+    A frame is a few drawPixmap calls per reel plus a cached overlay, driven
+    by a 16 ms precise timer and positioned by elapsed time so a late frame
+    never slows the spin down.
+    """
+    halfway = Signal()  # spin reached duration / 2: time to compute the result
+    landed = Signal()   # every reel has stopped
+
+    _strips = OrderedDict()  # (names version, width, row height, dpr) -> QPixmap
+    MAX_STRIPS = 4
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.setMinimumHeight(180)
+
+        self.names = []
+        self._version = 0
+        self.winner = None
+        self._winner_pixmap = None  # (key, QPixmap)
+        self.reels = []
+        self.duration = 3.0
+        self._halfway_sent = False
+        self._last = 0.0
+        self._overlay = None
+
+        self.clock = QElapsedTimer()
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(16)
+        self.timer.timeout.connect(self._tick)
+
+    # ---------- control ----------
+
+    def start(self, names, duration=3.0, reels=3):
+        names = list(dict.fromkeys(itertools.islice(names, MAX_NAMES))) or ["?"]
+        if names != self.names:
+            self.names = names
+            self._version = next(_versions)
+        self.duration = duration
+        self.winner = None
+        n = len(self.names)
+        self.reels = [_Reel(random.uniform(0, n), SPIN_SPEED * (1 + 0.12 * i)) for i in range(reels)]
+        self._halfway_sent = False
+        self._last = 0.0
+        self.clock.start()
+        self.timer.start()
+        self.update()
+
+    def is_spinning(self):
+        return self.timer.isActive()
+
+    def land(self, name):
+        """ease every reel onto name, left to right, within the configured duration"""
+        self.winner = name
+        now = self._now()
+        # the result normally arrives at duration / 2: use what is left of the
+        # spin for the ease, the last reel stopping at the end
+        ease = max(LAND_MIN, self.duration - now)
+        last = max(1, len(self.reels) - 1)
+        for k, reel in enumerate(self.reels):
+            if reel.land is not None:
+                continue
+            d = ease * (1 - LAND_SPREAD * (last - k) / last)
+            # a cubic ease-out over d seconds starts at speed 3 * distance / d:
+            # land where the current speed carries the reel, but at least past
+            # the rows on screen so the winner never pops into view
+            target = max(math.ceil(reel.pos + reel.speed * d / 3),
+                         math.ceil(reel.pos) + VISIBLE_ROWS // 2 + 1)
+            reel.target = target
+            reel.land = (now, reel.pos, target - reel.pos, d)
+
+    def show_now(self, name):
+        """skip: jump straight to name"""
+        self.winner = name
+        for reel in self.reels:
+            reel.target = reel.pos = round(reel.pos)
+            reel.land = None
+        self._finish()
+
+    def stop(self):
+        """stop without a result (nothing left to draw)"""
+        for reel in self.reels:
+            reel.land = None
+        self._finish()
+
+    def _now(self):
+        return self.clock.elapsed() / 1000.0
+
+    def _finish(self):
+        was_running = self.timer.isActive()
+        self.timer.stop()
+        self.update()
+        if was_running:
+            self.landed.emit()
+
+    def _tick(self):
+        now = self._now()
+        dt = now - self._last
+        self._last = now
+
+        done = bool(self.reels)
+        for reel in self.reels:
+            if reel.land is None:
+                reel.pos += reel.speed * dt
+                done = False
+                continue
+            start, origin, distance, d = reel.land
+            s = (now - start) / d if d > 0 else 1.0
+            if s >= 1.0:
+                reel.pos = origin + distance
+            else:
+                reel.pos = origin + distance * (1 - (1 - s) ** 3)
+                done = False
+
+        if not self._halfway_sent and now >= self.duration / 2:
+            self._halfway_sent = True
+            self.halfway.emit()
+
+        if done:
+            for reel in self.reels:
+                reel.land = None
+            self._finish()
+        else:
+            self.update()
+
+    # ---------- painting ----------
+
+    def resizeEvent(self, event):
+        self._overlay = None
+        super().resizeEvent(event)
+
+    def _reel_geometry(self):
+        count = max(1, len(self.reels))
+        gap = 12
+        width = max(1, (self.width() - gap * (count + 1)) // count)
+        row_h = max(1, self.height() // VISIBLE_ROWS)
+        return gap, width, row_h
+
+    def _font(self, row_h):
+        font = QFont(self.font())
+        font.setBold(True)
+        font.setPixelSize(max(10, int(row_h * 0.42)))
+        return font
+
+    def _render_rows(self, names, width, row_h):
+        dpr = self.devicePixelRatioF()
+        pixmap = QPixmap(int(width * dpr), int(row_h * len(names) * dpr))
+        pixmap.setDevicePixelRatio(dpr)
+        pixmap.fill(QColor("#ffffff"))
+
+        font = self._font(row_h)
+        metrics = QFontMetrics(font)
+        p = QPainter(pixmap)
+        p.setRenderHint(QPainter.TextAntialiasing)
+        p.setFont(font)
+        p.setPen(QColor("#222222"))
+        for i, name in enumerate(names):
+            text = metrics.elidedText(name, Qt.ElideRight, width - 12)
+            p.drawText(QRectF(0, i * row_h, width, row_h), Qt.AlignCenter, text)
+        p.end()
+        return pixmap
+
+    def _strip(self, width, row_h):
+        key = (self._version, width, row_h, self.devicePixelRatioF())
+        strip = self._strips.get(key)
+        if strip is not None:
+            self._strips.move_to_end(key)
+            return strip
+
+        strip = self._render_rows(self.names, width, row_h)
+        self._strips[key] = strip
+        while len(self._strips) > self.MAX_STRIPS:
+            self._strips.popitem(last=False)
+        return strip
+
+    def _winner_row(self, width, row_h):
+        key = (self.winner, width, row_h, self.devicePixelRatioF())
+        if self._winner_pixmap is None or self._winner_pixmap[0] != key:
+            self._winner_pixmap = (key, self._render_rows([self.winner], width, row_h))
+        return self._winner_pixmap[1]
+
+    def _overlay_pixmap(self):
+        if self._overlay is not None:
+            return self._overlay
+        dpr = self.devicePixelRatioF()
+        w, h = self.width(), self.height()
+        overlay = QPixmap(int(w * dpr), int(h * dpr))
+        overlay.setDevicePixelRatio(dpr)
+        overlay.fill(Qt.transparent)
+
+        p = QPainter(overlay)
+        shade = QLinearGradient(0, 0, 0, h)
+        shade.setColorAt(0.0, QColor(0, 0, 0, 150))
+        shade.setColorAt(0.33, QColor(0, 0, 0, 0))
+        shade.setColorAt(0.67, QColor(0, 0, 0, 0))
+        shade.setColorAt(1.0, QColor(0, 0, 0, 150))
+        p.fillRect(0, 0, w, h, shade)
+        _, _, row_h = self._reel_geometry()
+        p.setPen(QPen(QColor("#d4a017"), 3))
+        top = (h - row_h) / 2
+        p.drawRect(QRectF(2, top, w - 4, row_h))
+        p.end()
+
+        self._overlay = overlay
+        return overlay
+
+    def paintEvent(self, event):
+        p = QPainter(self)
+        p.fillRect(self.rect(), QColor("#2b2b2b"))
+        if self.reels and self.names:
+            gap, width, row_h = self._reel_geometry()
+            strip = self._strip(width, row_h)
+            winner = self._winner_row(width, row_h) if self.winner is not None else None
+            dpr = strip.devicePixelRatio()
+            n = len(self.names)
+            h = row_h * VISIBLE_ROWS
+            y0 = (self.height() - h) / 2
+            for k, reel in enumerate(self.reels):
+                x = gap + k * (width + gap)
+                p.setClipRect(QRectF(x, y0, width, h))
+                # middle row shows reel.pos, so the window starts one row above
+                top = reel.pos - (VISIBLE_ROWS - 1) / 2
+                first = math.floor(top)
+                for row in range(first, first + VISIBLE_ROWS + 1):
+                    y = y0 + (row - top) * row_h
+                    if row == reel.target and winner is not None:
+                        p.drawPixmap(QRectF(x, y, width, row_h), winner,
+                                     QRectF(0, 0, width * dpr, row_h * dpr))
+                    else:
+                        p.drawPixmap(QRectF(x, y, width, row_h), strip,
+                                     QRectF(0, (row % n) * row_h * dpr, width * dpr, row_h * dpr))
+            p.setClipping(False)
+        p.drawPixmap(0, 0, self._overlay_pixmap())
+        p.end()